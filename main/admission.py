@@ -0,0 +1,200 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+# Wait at most this long for a slot; clients may ask for less with X-Request-Timeout.
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+# Per-user token bucket keyed by the JWT subject; RATE_LIMIT_RPS=0 turns it off.
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "20"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "40"))
+RATE_LIMIT_MAX_USERS = int(os.getenv("RATE_LIMIT_MAX_USERS", "10000"))
+
+# Never queued or limited, so probes keep answering under overload.
+EXEMPT_PATHS = ("/health", "/metrics")
+
+
+def _limit(group: str, setting: str, default: int) -> int:
+    return int(os.getenv(f"ADMISSION_{group.upper()}_{setting}", str(default)))
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str):
+        self.reason = reason
+
+
+class RouteGroup:
+    """At most ``concurrency`` requests in flight, ``queue_size`` more waiting (FIFO)."""
+
+    def __init__(self, name: str, concurrency: int, queue_size: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self._waiters: "deque[asyncio.Future]" = deque()
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float) -> None:
+        if self.in_flight < self.concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            self.rejected_full += 1
+            raise Rejected("queue full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on.
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected_timeout += 1
+            raise Rejected("queue timeout")
+        self.admitted += 1
+
+    def release(self) -> None:
+        # A freed slot goes straight to the oldest waiter, so in_flight stays put.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(ADMISSION_QUEUE_TIMEOUT))
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+
+class TokenBuckets:
+    """``rate`` requests per second per key with bursts up to ``burst``; LRU-bounded."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self.limited = 0
+
+    def take(self, key: str) -> float:
+        """0 if a token was taken, else the seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        self.limited += 1
+        return (1 - bucket[0]) / self.rate
+
+
+def route_group(path: str) -> str:
+    if path == "/users/login":
+        return "login"
+    if path.endswith("/export"):
+        return "export"
+    return "default"
+
+
+GROUPS: Dict[str, RouteGroup] = {
+    "default": RouteGroup("default", _limit("default", "CONCURRENCY", 64), _limit("default", "QUEUE", 256)),
+    "login": RouteGroup("login", _limit("login", "CONCURRENCY", 16), _limit("login", "QUEUE", 64)),
+    "export": RouteGroup("export", _limit("export", "CONCURRENCY", 4), _limit("export", "QUEUE", 8)),
+}
+user_buckets = TokenBuckets(RATE_LIMIT_RPS, RATE_LIMIT_BURST, RATE_LIMIT_MAX_USERS) if RATE_LIMIT_RPS > 0 else None
+
+
+def admission_stats() -> dict:
+    return {
+        "groups": {name: group.stats() for name, group in GROUPS.items()},
+        "rate_limited": user_buckets.limited if user_buckets else 0,
+        "rate_limit_users": len(user_buckets._buckets) if user_buckets else 0,
+    }
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class AdmissionMiddleware:
+    """Per-user rate limits, then a concurrency cap per route group.
+
+    ``subject`` maps an Authorization header to the verified JWT subject, or
+    None for anonymous or invalid tokens (those are not rate limited here;
+    the route still rejects them).
+    """
+
+    def __init__(self, app, subject: Callable[[str], Optional[str]]):
+        self.app = app
+        self.subject = subject
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if user_buckets is not None:
+            authorization = headers.get("authorization")
+            subject = self.subject(authorization) if authorization else None
+            if subject is not None:
+                wait = user_buckets.take(subject)
+                if wait:
+                    await _reject(429, "Too many requests", wait)(scope, receive, send)
+                    return
+
+        group = GROUPS[route_group(scope["path"])]
+        timeout = ADMISSION_QUEUE_TIMEOUT
+        try:
+            timeout = min(timeout, float(headers.get("x-request-timeout", timeout)))
+        except ValueError:
+            pass
+        try:
+            await group.acquire(timeout)
+        except Rejected as e:
+            await _reject(503, f"Server busy ({e.reason})", group.retry_after())(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            group.release()
@@ -0,0 +1,60 @@
+"""restaurant open minutes
+
+Revision ID: 15071fead396
+Revises: 50b9483f3b89
+Create Date: 2026-10-18 13:40:51.772019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '15071fead396'
+down_revision: Union[str, None] = '50b9483f3b89'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _minute(column: str) -> str:
+    return f"(EXTRACT(HOUR FROM {column}) * 60 + EXTRACT(MINUTE FROM {column}))::int"
+
+
+OPEN_MINUTES_SQL = (
+    "CASE "
+    "WHEN schedule_open = schedule_close THEN int4multirange(int4range(0, 1440)) "
+    "WHEN schedule_open < schedule_close THEN "
+    f"int4multirange(int4range({_minute('schedule_open')}, {_minute('schedule_close')})) "
+    f"ELSE int4multirange(int4range({_minute('schedule_open')}, 1440), "
+    f"int4range(0, {_minute('schedule_close')})) "
+    "END"
+)
+
+
+def upgrade() -> None:
+    # restaurants used to be created by create_all() only.
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS restaurants (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR NOT NULL,
+            address VARCHAR NOT NULL,
+            menu JSON NOT NULL,
+            schedule_open TIME WITHOUT TIME ZONE NOT NULL,
+            schedule_close TIME WITHOUT TIME ZONE NOT NULL
+        )
+    """)
+    op.execute(
+        "ALTER TABLE restaurants ADD COLUMN IF NOT EXISTS open_minutes int4multirange "
+        f"GENERATED ALWAYS AS ({OPEN_MINUTES_SQL}) STORED"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_restaurants_open_minutes "
+        "ON restaurants USING gist (open_minutes)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_restaurants_open_minutes', table_name='restaurants')
+    op.drop_column('restaurants', 'open_minutes')
@@ -0,0 +1,35 @@
+"""guests indexes
+
+Revision ID: 50b9483f3b89
+Revises: 8355593be022
+Create Date: 2026-10-18 11:05:27.402911
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '50b9483f3b89'
+down_revision: Union[str, None] = '8355593be022'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so a large guests table stays writable meanwhile.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_guests_holiday_id_status', 'guests', ['holiday_id', 'status'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_guests_telegram_id'), 'guests', ['telegram_id'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_guests_telegram_id'), table_name='guests',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_guests_holiday_id_status', table_name='guests',
+                      postgresql_concurrently=True, if_exists=True)
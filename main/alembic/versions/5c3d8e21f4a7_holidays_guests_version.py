@@ -0,0 +1,30 @@
+"""holidays guests version
+
+Revision ID: 5c3d8e21f4a7
+Revises: 0b1e7f3a9c52
+Create Date: 2026-10-18 18:47:31.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from guest_counts import COUNT_FUNCTIONS
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c3d8e21f4a7'
+down_revision: Union[str, None] = '0b1e7f3a9c52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('holidays', sa.Column('guests_version', sa.Integer(), server_default='0', nullable=False))
+    op.execute(COUNT_FUNCTIONS[revision])
+
+
+def downgrade() -> None:
+    op.execute(COUNT_FUNCTIONS[down_revision])
+    op.drop_column('holidays', 'guests_version')
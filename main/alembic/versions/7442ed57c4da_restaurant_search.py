@@ -0,0 +1,54 @@
+"""restaurant search
+
+Revision ID: 7442ed57c4da
+Revises: cf5e4c68d955
+Create Date: 2026-10-18 14:47:05.621930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7442ed57c4da'
+down_revision: Union[str, None] = 'cf5e4c68d955'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_FUNCTION = """
+CREATE OR REPLACE FUNCTION restaurants_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A') ||
+        setweight(jsonb_to_tsvector('russian', coalesce(NEW.menu::jsonb, '{}'), '["string"]'), 'B') ||
+        setweight(to_tsvector('russian', coalesce(NEW.address, '')), 'C');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+SEARCH_TRIGGER = (
+    "CREATE TRIGGER restaurants_search_vector BEFORE INSERT OR UPDATE OF name, address, menu "
+    "ON restaurants FOR EACH ROW EXECUTE FUNCTION restaurants_search_vector()"
+)
+
+
+def upgrade() -> None:
+    op.add_column('restaurants', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute(SEARCH_FUNCTION)
+    op.execute(SEARCH_TRIGGER)
+    # Fire the trigger once for existing rows.
+    op.execute("UPDATE restaurants SET name = name")
+    op.create_index('ix_restaurants_search_vector', 'restaurants', ['search_vector'],
+                    unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_restaurants_search_vector', table_name='restaurants', postgresql_using='gin')
+    op.execute("DROP TRIGGER IF EXISTS restaurants_search_vector ON restaurants")
+    op.execute("DROP FUNCTION IF EXISTS restaurants_search_vector()")
+    op.drop_column('restaurants', 'search_vector')
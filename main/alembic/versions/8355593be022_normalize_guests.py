@@ -0,0 +1,95 @@
+"""normalize guests
+
+Revision ID: 8355593be022
+Revises: 29e8f40b8c10
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from guest_counts import COUNT_FUNCTIONS, COUNT_TRIGGERS
+
+# revision identifiers, used by Alembic.
+revision: str = '8355593be022'
+down_revision: Union[str, None] = '29e8f40b8c10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('holiday_guest_counts',
+    sa.Column('holiday_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['holiday_id'], ['holidays.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('holiday_id', 'status')
+    )
+
+    # Guests that only ever made it into the JSONB mirror become real rows.
+    op.execute("""
+        INSERT INTO guests (holiday_id, name, telegram_id, status)
+        SELECT h.id, e.value->>'name', e.value->>'telegram_id', s.key
+        FROM holidays h
+        CROSS JOIN LATERAL jsonb_each(coalesce(h.guests, '{}'::jsonb)) AS s
+        CROSS JOIN LATERAL jsonb_array_elements(
+            CASE WHEN jsonb_typeof(s.value) = 'array' THEN s.value ELSE '[]'::jsonb END
+        ) AS e
+        WHERE jsonb_typeof(e.value) = 'object'
+          AND e.value->>'name' IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM guests g
+              WHERE g.holiday_id = h.id AND g.name = e.value->>'name'
+          )
+    """)
+    op.execute("UPDATE guests SET status = 'pending' WHERE status IS NULL")
+    op.alter_column('guests', 'status', existing_type=sa.String(),
+                    nullable=False, server_default='pending')
+
+    op.execute("""
+        INSERT INTO holiday_guest_counts (holiday_id, status, count)
+        SELECT holiday_id, status, count(*) FROM guests GROUP BY holiday_id, status
+    """)
+    op.execute("""
+        UPDATE holidays h
+        SET guests_count = (SELECT count(*) FROM guests g WHERE g.holiday_id = h.id)
+    """)
+    op.alter_column('holidays', 'guests_count', existing_type=sa.Integer(),
+                    nullable=False, server_default='0')
+    op.drop_column('holidays', 'guests')
+
+    op.execute(COUNT_FUNCTIONS[revision])
+    for trigger in COUNT_TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS guests_counts_insert ON guests")
+    op.execute("DROP TRIGGER IF EXISTS guests_counts_update ON guests")
+    op.execute("DROP TRIGGER IF EXISTS guests_counts_delete ON guests")
+    op.execute("DROP FUNCTION IF EXISTS guests_sync_counts()")
+
+    op.add_column('holidays', sa.Column('guests', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.execute("""
+        UPDATE holidays h
+        SET guests = coalesce((
+            SELECT jsonb_object_agg(s.status, s.items)
+            FROM (
+                SELECT g.status,
+                       jsonb_agg(jsonb_strip_nulls(jsonb_build_object(
+                           'name', g.name, 'telegram_id', g.telegram_id
+                       )) ORDER BY g.id) AS items
+                FROM guests g
+                WHERE g.holiday_id = h.id
+                GROUP BY g.status
+            ) s
+        ), '{}'::jsonb)
+    """)
+    op.alter_column('holidays', 'guests_count', existing_type=sa.Integer(),
+                    nullable=True, server_default=None)
+    op.alter_column('guests', 'status', existing_type=sa.String(),
+                    nullable=True, server_default=None)
+    op.drop_table('holiday_guest_counts')
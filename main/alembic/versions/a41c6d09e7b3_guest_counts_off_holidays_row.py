@@ -0,0 +1,47 @@
+"""guest counts off holidays row
+
+Revision ID: a41c6d09e7b3
+Revises: 5c3d8e21f4a7
+Create Date: 2026-10-18 20:05:13.442871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from guest_counts import COUNT_FUNCTIONS
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c6d09e7b3'
+down_revision: Union[str, None] = '5c3d8e21f4a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # No guest writes between switching the trigger body and dropping the columns.
+    op.execute("LOCK TABLE guests IN SHARE ROW EXCLUSIVE MODE")
+    op.add_column('holiday_guest_counts', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.execute(COUNT_FUNCTIONS[revision])
+    op.drop_column('holidays', 'guests_version')
+    op.drop_column('holidays', 'guests_count')
+
+
+def downgrade() -> None:
+    op.execute("LOCK TABLE guests IN SHARE ROW EXCLUSIVE MODE")
+    op.add_column('holidays', sa.Column('guests_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('holidays', sa.Column('guests_version', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE holidays h
+        SET guests_count = t.count, guests_version = t.version
+        FROM (
+            SELECT holiday_id, sum(count) AS count, sum(version) AS version
+            FROM holiday_guest_counts
+            GROUP BY holiday_id
+        ) t
+        WHERE h.id = t.holiday_id
+    """)
+    op.execute(COUNT_FUNCTIONS[down_revision])
+    op.drop_column('holiday_guest_counts', 'version')
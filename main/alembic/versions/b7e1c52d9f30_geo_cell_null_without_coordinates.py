@@ -0,0 +1,53 @@
+"""geo cell null without coordinates
+
+Revision ID: b7e1c52d9f30
+Revises: e2f94b7a6d18
+Create Date: 2026-10-18 22:15:37.206841
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e1c52d9f30'
+down_revision: Union[str, None] = 'e2f94b7a6d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Databases migrated through cf5e4c68d955 before its expression was fixed
+# gave holidays without coordinates a cell; a generated column's expression
+# can't be altered before PostgreSQL 17, so the column is recreated.
+GEO_CELL_SQL = (
+    "CASE WHEN latitude IS NULL OR longitude IS NULL THEN NULL ELSE "
+    "LEAST(floor((latitude + 90) * 10), 1799)::int * 3600 "
+    "+ LEAST(floor((longitude + 180) * 10), 3599)::int END"
+)
+PREVIOUS_GEO_CELL_SQL = (
+    "LEAST(floor((latitude + 90) * 10), 1799)::int * 3600 "
+    "+ LEAST(floor((longitude + 180) * 10), 3599)::int"
+)
+
+
+def _recreate_geo_cell(expression: str) -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_holidays_geo_cell', table_name='holidays',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('holidays', 'geo_cell')
+    op.execute(
+        "ALTER TABLE holidays ADD COLUMN geo_cell integer "
+        f"GENERATED ALWAYS AS ({expression}) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index('ix_holidays_geo_cell', 'holidays', ['geo_cell'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    _recreate_geo_cell(GEO_CELL_SQL)
+
+
+def downgrade() -> None:
+    _recreate_geo_cell(PREVIOUS_GEO_CELL_SQL)
@@ -0,0 +1,43 @@
+"""holidays geo cell
+
+Revision ID: cf5e4c68d955
+Revises: 15071fead396
+Create Date: 2026-10-18 14:02:11.384517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cf5e4c68d955'
+down_revision: Union[str, None] = '15071fead396'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 0.1 degree grid cells, numbered row by row from the south-west corner;
+# NULL without coordinates (LEAST() would skip the NULL).
+GEO_CELL_SQL = (
+    "CASE WHEN latitude IS NULL OR longitude IS NULL THEN NULL ELSE "
+    "LEAST(floor((latitude + 90) * 10), 1799)::int * 3600 "
+    "+ LEAST(floor((longitude + 180) * 10), 3599)::int END"
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE holidays ADD COLUMN IF NOT EXISTS geo_cell integer "
+        f"GENERATED ALWAYS AS ({GEO_CELL_SQL}) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index('ix_holidays_geo_cell', 'holidays', ['geo_cell'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_holidays_geo_cell', table_name='holidays',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('holidays', 'geo_cell')
@@ -0,0 +1,56 @@
+"""guest stats summary tables
+
+Revision ID: d6fc3444d7df
+Revises: 7442ed57c4da
+Create Date: 2026-10-18 15:36:42.907113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from guest_counts import COUNT_FUNCTIONS
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6fc3444d7df'
+down_revision: Union[str, None] = '7442ed57c4da'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('guest_status_totals',
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('status')
+    )
+    op.create_table('guest_activity',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status')
+    )
+
+    # No guest writes between the backfill and the new trigger body.
+    op.execute("LOCK TABLE guests IN SHARE ROW EXCLUSIVE MODE")
+    op.execute("""
+        INSERT INTO guest_status_totals (status, count)
+        SELECT status, count(*) FROM guests GROUP BY status
+    """)
+    op.execute("""
+        INSERT INTO guest_activity (day, status, count)
+        SELECT (updated_at AT TIME ZONE 'UTC')::date, status, count(*)
+        FROM guests
+        WHERE updated_at IS NOT NULL
+        GROUP BY 1, 2
+    """)
+    op.execute(COUNT_FUNCTIONS[revision])
+
+
+def downgrade() -> None:
+    # The body this revision replaced.
+    op.execute(COUNT_FUNCTIONS["8355593be022"])
+    op.drop_table('guest_activity')
+    op.drop_table('guest_status_totals')
@@ -0,0 +1,77 @@
+"""sharded global guest stats
+
+Revision ID: e2f94b7a6d18
+Revises: a41c6d09e7b3
+Create Date: 2026-10-18 20:41:52.730164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from guest_counts import COUNT_FUNCTIONS, GUEST_STATS_SHARDS
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2f94b7a6d18'
+down_revision: Union[str, None] = 'a41c6d09e7b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # No guest writes between the backfill and the new trigger body.
+    op.execute("LOCK TABLE guests IN SHARE ROW EXCLUSIVE MODE")
+    op.drop_index('ix_guest_activity_day', table_name='guest_activity')
+    op.drop_table('guest_activity')
+    op.create_table('guest_status_totals',
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('status', 'shard')
+    )
+    op.create_table('guest_activity',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status', 'shard')
+    )
+    op.execute(f"""
+        INSERT INTO guest_status_totals (status, shard, count)
+        SELECT status, holiday_id % {GUEST_STATS_SHARDS}, count(*)
+        FROM guests
+        GROUP BY 1, 2
+    """)
+    op.execute(f"""
+        INSERT INTO guest_activity (day, status, shard, count)
+        SELECT (updated_at AT TIME ZONE 'UTC')::date, status, holiday_id % {GUEST_STATS_SHARDS}, count(*)
+        FROM guests
+        WHERE updated_at IS NOT NULL
+        GROUP BY 1, 2, 3
+    """)
+    op.execute(COUNT_FUNCTIONS[revision])
+
+
+def downgrade() -> None:
+    op.execute("LOCK TABLE guests IN SHARE ROW EXCLUSIVE MODE")
+    op.drop_table('guest_activity')
+    op.drop_table('guest_status_totals')
+    op.create_table('guest_activity',
+    sa.Column('holiday_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['holiday_id'], ['holidays.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('holiday_id', 'day', 'status')
+    )
+    op.create_index('ix_guest_activity_day', 'guest_activity', ['day'], unique=False)
+    op.execute("""
+        INSERT INTO guest_activity (holiday_id, day, status, count)
+        SELECT holiday_id, (updated_at AT TIME ZONE 'UTC')::date, status, count(*)
+        FROM guests
+        WHERE updated_at IS NOT NULL
+        GROUP BY 1, 2, 3
+    """)
+    op.execute(COUNT_FUNCTIONS[down_revision])
@@ -1,18 +1,168 @@
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
+from pool_metrics import PoolMetrics, instrumented_pool
+from slow_query import SlowQueryLog
 import os
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
+# "async" - asyncpg engine, handlers never leave the event loop.
+# "sync"  - the old psycopg2 engine driven from the threadpool, kept for benchmarking.
+DB_MODE = os.getenv("DB_MODE", "async").lower()
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+
+# Connection pool, shared by both engines (each engine owns its own pool).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_flag("DB_POOL_PRE_PING", "true")
+DB_POOL_USE_LIFO = _env_flag("DB_POOL_USE_LIFO", "true")
+
+# Slow-query recorder, off unless SLOW_QUERY_MS is set. A SLOW_QUERY_EXPLAIN_RATE
+# fraction of slow SELECTs is re-run under EXPLAIN (ANALYZE, BUFFERS).
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+    "pool_use_lifo": DB_POOL_USE_LIFO,
+}
+
+
+def make_async_url(url: str) -> str:
+    """Rewrite a postgres URL so it uses the asyncpg driver."""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or make_async_url(DATABASE_URL)
+
+sync_pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+engine = create_engine(
+    DATABASE_URL, poolclass=instrumented_pool(QueuePool, sync_pool_metrics), **POOL_OPTIONS
+)
+sync_pool_metrics.attach(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=instrumented_pool(AsyncAdaptedQueuePool, async_pool_metrics),
+    **POOL_OPTIONS,
+)
+async_pool_metrics.attach(async_engine.sync_engine)
+# Objects stay loaded after commit so handlers can serialize them without
+# triggering lazy loads outside the greenlet.
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 Base = declarative_base()
 
-def get_db():
+slow_query_log = SlowQueryLog(SLOW_QUERY_MS / 1000, SLOW_QUERY_EXPLAIN_RATE, SLOW_QUERY_LOG_SIZE)
+if SLOW_QUERY_MS > 0:
+    slow_query_log.attach(engine)
+    slow_query_log.attach(async_engine.sync_engine)
+
+
+class SyncSessionAdapter:
+    """Gives a blocking Session the awaitable API of AsyncSession.
+
+    Every call that may touch the database is pushed to the threadpool, so the
+    services only have to be written once against the AsyncSession interface.
+    """
+
+    _blocking = {
+        "execute", "scalar", "scalars", "get", "delete", "flush",
+        "commit", "rollback", "refresh", "close", "merge", "connection",
+    }
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def __getattr__(self, name):
+        attr = getattr(self.sync_session, name)
+        if name not in self._blocking:
+            return attr
+
+        async def call(*args, **kwargs):
+            return await run_in_threadpool(attr, *args, **kwargs)
+
+        return call
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def stream(self, statement, params=None, **kwargs):
+        statement = statement.execution_options(stream_results=True)
+        result = await run_in_threadpool(self.sync_session.execute, statement, params, **kwargs)
+        return _ThreadedResult(result)
+
+
+class _ThreadedResult:
+    """The ``partitions()`` part of AsyncResult over a server-side cursor."""
+
+    def __init__(self, result):
+        self._result = result
+
+    async def partitions(self, size=None):
+        while True:
+            rows = await run_in_threadpool(self._result.fetchmany, size)
+            if not rows:
+                return
+            yield rows
+
+
+def pool_status() -> dict:
+    """Live state of the pool serving requests in the current DB_MODE."""
+    if DB_MODE == "sync":
+        return {"mode": DB_MODE, **sync_pool_metrics.snapshot(engine.pool)}
+    return {"mode": DB_MODE, **async_pool_metrics.snapshot(async_engine.sync_engine.pool)}
+
+
+@asynccontextmanager
+async def open_session():
+    """A session for the current DB_MODE, for work that outlives a request's
+    dependencies (e.g. the body of a StreamingResponse)."""
+    if DB_MODE == "sync":
+        # Same expiry rules as AsyncSessionLocal so both modes issue the same queries.
+        db = SyncSessionAdapter(SessionLocal(expire_on_commit=False))
+        try:
+            yield db
+        finally:
+            await db.close()
+        return
+
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_db():
+    async with open_session() as db:
+        yield db
+
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
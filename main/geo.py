@@ -0,0 +1,74 @@
+import math
+from typing import List, Tuple
+
+from sqlalchemy import func
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Holidays are bucketed into a fixed 0.1° x 0.1° grid (about 11 km north-south).
+# Cells are numbered row by row from the south-west corner, so a run of cells
+# along one latitude row is a contiguous range of the B-tree indexed geo_cell.
+CELLS_PER_DEGREE = 10
+GRID_ROWS = 180 * CELLS_PER_DEGREE
+GRID_COLUMNS = 360 * CELLS_PER_DEGREE
+
+# LEAST() skips NULLs, so holidays without coordinates are kept out explicitly.
+GEO_CELL_SQL = (
+    "CASE WHEN latitude IS NULL OR longitude IS NULL THEN NULL ELSE "
+    f"LEAST(floor((latitude + 90) * {CELLS_PER_DEGREE}), {GRID_ROWS - 1})::int * {GRID_COLUMNS} "
+    f"+ LEAST(floor((longitude + 180) * {CELLS_PER_DEGREE}), {GRID_COLUMNS - 1})::int END"
+)
+
+
+def _row(lat: float) -> int:
+    return min(int(math.floor((lat + 90) * CELLS_PER_DEGREE)), GRID_ROWS - 1)
+
+
+def _column(lon: float) -> int:
+    return min(int(math.floor((lon + 180) * CELLS_PER_DEGREE)), GRID_COLUMNS - 1)
+
+
+def _column_spans(lon: float, dlon: float) -> List[Tuple[int, int]]:
+    if dlon >= 180:
+        return [(0, GRID_COLUMNS - 1)]
+    west, east = lon - dlon, lon + dlon
+    if west < -180:
+        return [(0, _column(east)), (_column(west + 360), GRID_COLUMNS - 1)]
+    if east > 180:
+        return [(0, _column(east - 360)), (_column(west), GRID_COLUMNS - 1)]
+    return [(_column(west), _column(east))]
+
+
+def cell_ranges(lat: float, lon: float, radius_km: float) -> List[Tuple[int, int]]:
+    """Inclusive geo_cell ranges covering every point within ``radius_km``.
+
+    One range per grid row of the bounding box (two where it wraps the
+    antimeridian); adjacent ranges are merged, so boxes spanning all
+    longitudes near a pole collapse into a single range.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    widest = math.cos(math.radians(max(abs(south), abs(north))))
+    dlon = 180.0 if widest < 1e-9 else dlat / widest
+
+    ranges: List[Tuple[int, int]] = []
+    for row in range(_row(south), _row(north) + 1):
+        for first, last in _column_spans(lon, dlon):
+            start, end = row * GRID_COLUMNS + first, row * GRID_COLUMNS + last
+            if ranges and ranges[-1][1] + 1 >= start:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end))
+            else:
+                ranges.append((start, end))
+    return ranges
+
+
+def haversine_km(lat_column, lon_column, lat: float, lon: float):
+    """SQL expression for the great-circle distance from (lat, lon) in km."""
+    dlat = func.radians(lat_column - lat) / 2
+    dlon = func.radians(lon_column - lon) / 2
+    a = (
+        func.power(func.sin(dlat), 2)
+        + math.cos(math.radians(lat)) * func.cos(func.radians(lat_column)) * func.power(func.sin(dlon), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * func.asin(func.least(1.0, func.sqrt(a)))
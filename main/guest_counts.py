@@ -0,0 +1,197 @@
+"""SQL of the guests_sync_counts() trigger, in every revision a migration installed.
+
+Statement-level triggers on guests fold each INSERT/UPDATE/DELETE into a
+few set-based upserts of the summary tables. Each migration that changes the
+function installs ``COUNT_FUNCTIONS[<its revision>]`` and, on downgrade, the
+revision before it; models.py installs ``CURRENT_COUNT_FUNCTION`` on
+create_all(). Add a new entry rather than editing an old one: databases
+already carry the old bodies.
+
+Every body is run through format() by plpgsql, with ``%s`` standing for
+the rows the statement changed (``changed``, one ``n`` of +1 or -1 per row),
+so a literal modulo is written ``%%``.
+"""
+
+# Global figures (guest_status_totals, guest_activity) are spread over this
+# many rows per key, picked by holiday_id % GUEST_STATS_SHARDS, so RSVPs on
+# different holidays rarely share a row and reads sum a fixed number of rows.
+# Changing it needs a new revision that re-buckets those tables.
+GUEST_STATS_SHARDS = 16
+
+# The columns of new_rows/old_rows each revision needs.
+_CHANGED_COLUMNS = "holiday_id, status, updated_at"
+
+
+def _count_function(body: str, columns: str = _CHANGED_COLUMNS) -> str:
+    return f"""
+CREATE OR REPLACE FUNCTION guests_sync_counts() RETURNS trigger AS $$
+DECLARE
+    delta_rows text;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        delta_rows := 'SELECT {columns}, 1 AS n FROM new_rows';
+    ELSIF TG_OP = 'DELETE' THEN
+        delta_rows := 'SELECT {columns}, -1 AS n FROM old_rows';
+    ELSE
+        delta_rows := 'SELECT {columns}, 1 AS n FROM new_rows '
+                      'UNION ALL SELECT {columns}, -1 FROM old_rows';
+    END IF;
+
+    EXECUTE format($sql$
+{body}
+    $sql$, delta_rows);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+_HOLIDAY_COUNTS = """
+        ), counted AS (
+            INSERT INTO holiday_guest_counts AS c (holiday_id, status, count)
+            SELECT d.holiday_id, d.status, d.n
+            FROM delta d
+            WHERE EXISTS (SELECT 1 FROM holidays h WHERE h.id = d.holiday_id)
+            ON CONFLICT (holiday_id, status) DO UPDATE SET count = c.count + EXCLUDED.count
+        )"""
+
+_HOLIDAYS_GUESTS_COUNT = """
+        UPDATE holidays h
+        SET guests_count = h.guests_count + t.n
+        FROM (SELECT holiday_id, sum(n) AS n FROM delta GROUP BY holiday_id) t
+        WHERE h.id = t.holiday_id AND t.n <> 0"""
+
+_CHANGED_DELTA = """
+        WITH changed AS (
+            %s
+        ), delta AS (
+            SELECT holiday_id, status, sum(n) AS n
+            FROM changed
+            GROUP BY holiday_id, status
+            HAVING sum(n) <> 0"""
+
+COUNT_FUNCTIONS = {
+    # holiday_guest_counts and holidays.guests_count.
+    "8355593be022": _count_function("""
+        WITH delta AS (
+            SELECT holiday_id, status, sum(n) AS n
+            FROM (%s) AS changed
+            GROUP BY holiday_id, status
+            HAVING sum(n) <> 0""" + _HOLIDAY_COUNTS + _HOLIDAYS_GUESTS_COUNT,
+        columns="holiday_id, status",
+    ),
+    # Plus one global guest_status_totals row per status and guest_activity
+    # row per (day, status).
+    "d6fc3444d7df": _count_function(_CHANGED_DELTA + """
+        ), totals AS (
+            INSERT INTO guest_status_totals AS t (status, count)
+            SELECT status, sum(n) FROM delta GROUP BY status HAVING sum(n) <> 0
+            ON CONFLICT (status) DO UPDATE SET count = t.count + EXCLUDED.count
+        ), activity AS (
+            INSERT INTO guest_activity AS a (day, status, count)
+            SELECT (updated_at AT TIME ZONE 'UTC')::date, status, sum(n)
+            FROM changed
+            WHERE updated_at IS NOT NULL
+            GROUP BY 1, 2
+            HAVING sum(n) <> 0
+            ON CONFLICT (day, status) DO UPDATE SET count = a.count + EXCLUDED.count""" +
+        _HOLIDAY_COUNTS + _HOLIDAYS_GUESTS_COUNT),
+    # No global rows: guest_activity keyed by holiday instead.
+    "0b1e7f3a9c52": _count_function(_CHANGED_DELTA + """
+        ), activity AS (
+            INSERT INTO guest_activity AS a (holiday_id, day, status, count)
+            SELECT c.holiday_id, (c.updated_at AT TIME ZONE 'UTC')::date, c.status, sum(c.n)
+            FROM changed c
+            WHERE c.updated_at IS NOT NULL
+              AND EXISTS (SELECT 1 FROM holidays h WHERE h.id = c.holiday_id)
+            GROUP BY 1, 2, 3
+            HAVING sum(c.n) <> 0
+            ON CONFLICT (holiday_id, day, status) DO UPDATE SET count = a.count + EXCLUDED.count""" +
+        _HOLIDAY_COUNTS + _HOLIDAYS_GUESTS_COUNT),
+    # Plus holidays.guests_version, bumped for every holiday with a changed guest.
+    "5c3d8e21f4a7": _count_function(_CHANGED_DELTA + """
+        ), activity AS (
+            INSERT INTO guest_activity AS a (holiday_id, day, status, count)
+            SELECT c.holiday_id, (c.updated_at AT TIME ZONE 'UTC')::date, c.status, sum(c.n)
+            FROM changed c
+            WHERE c.updated_at IS NOT NULL
+              AND EXISTS (SELECT 1 FROM holidays h WHERE h.id = c.holiday_id)
+            GROUP BY 1, 2, 3
+            HAVING sum(c.n) <> 0
+            ON CONFLICT (holiday_id, day, status) DO UPDATE SET count = a.count + EXCLUDED.count""" +
+        _HOLIDAY_COUNTS + """
+        UPDATE holidays h
+        SET guests_count = h.guests_count + t.n, guests_version = h.guests_version + 1
+        FROM (SELECT holiday_id, sum(n) AS n FROM changed GROUP BY holiday_id) t
+        WHERE h.id = t.holiday_id"""),
+    # The holidays row is no longer written: a holiday's count and version
+    # are the sums of its holiday_guest_counts rows, whose version goes up
+    # with every write to a guest in that (holiday, status).
+    "a41c6d09e7b3": _count_function("""
+        WITH changed AS (
+            %s
+        ), delta AS (
+            SELECT holiday_id, status, sum(n) AS n
+            FROM changed
+            GROUP BY holiday_id, status
+        ), activity AS (
+            INSERT INTO guest_activity AS a (holiday_id, day, status, count)
+            SELECT c.holiday_id, (c.updated_at AT TIME ZONE 'UTC')::date, c.status, sum(c.n)
+            FROM changed c
+            WHERE c.updated_at IS NOT NULL
+              AND EXISTS (SELECT 1 FROM holidays h WHERE h.id = c.holiday_id)
+            GROUP BY 1, 2, 3
+            HAVING sum(c.n) <> 0
+            ON CONFLICT (holiday_id, day, status) DO UPDATE SET count = a.count + EXCLUDED.count
+        )
+        INSERT INTO holiday_guest_counts AS c (holiday_id, status, count, version)
+        SELECT d.holiday_id, d.status, d.n, 1
+        FROM delta d
+        WHERE EXISTS (SELECT 1 FROM holidays h WHERE h.id = d.holiday_id)
+        ON CONFLICT (holiday_id, status)
+        DO UPDATE SET count = c.count + EXCLUDED.count, version = c.version + 1"""),
+    # Global totals and activity back, each spread over GUEST_STATS_SHARDS rows.
+    "e2f94b7a6d18": _count_function(f"""
+        WITH changed AS (
+            %s
+        ), delta AS (
+            SELECT holiday_id, status, sum(n) AS n
+            FROM changed
+            GROUP BY holiday_id, status
+        ), totals AS (
+            INSERT INTO guest_status_totals AS t (status, shard, count)
+            SELECT status, holiday_id %% {GUEST_STATS_SHARDS}, sum(n)
+            FROM delta
+            GROUP BY 1, 2
+            HAVING sum(n) <> 0
+            ON CONFLICT (status, shard) DO UPDATE SET count = t.count + EXCLUDED.count
+        ), activity AS (
+            INSERT INTO guest_activity AS a (day, status, shard, count)
+            SELECT (updated_at AT TIME ZONE 'UTC')::date, status, holiday_id %% {GUEST_STATS_SHARDS}, sum(n)
+            FROM changed
+            WHERE updated_at IS NOT NULL
+            GROUP BY 1, 2, 3
+            HAVING sum(n) <> 0
+            ON CONFLICT (day, status, shard) DO UPDATE SET count = a.count + EXCLUDED.count
+        )
+        INSERT INTO holiday_guest_counts AS c (holiday_id, status, count, version)
+        SELECT d.holiday_id, d.status, d.n, 1
+        FROM delta d
+        WHERE EXISTS (SELECT 1 FROM holidays h WHERE h.id = d.holiday_id)
+        ON CONFLICT (holiday_id, status)
+        DO UPDATE SET count = c.count + EXCLUDED.count, version = c.version + 1"""),
+}
+
+CURRENT_COUNT_FUNCTION = COUNT_FUNCTIONS["e2f94b7a6d18"]
+
+COUNT_TRIGGERS = (
+    "CREATE TRIGGER guests_counts_insert AFTER INSERT ON guests "
+    "REFERENCING NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION guests_sync_counts()",
+    "CREATE TRIGGER guests_counts_update AFTER UPDATE ON guests "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION guests_sync_counts()",
+    "CREATE TRIGGER guests_counts_delete AFTER DELETE ON guests "
+    "REFERENCING OLD TABLE AS old_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION guests_sync_counts()",
+)
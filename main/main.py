@@ -1,28 +1,48 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from routes.user.route import router as UserRoute 
 from routes.restaurant.route import router as RestaurantRoute 
 from routes.holiday.route import router as HolidayRoute 
+from routes.admin.route import router as AdminRoute
+from routes.user.auth import token_subject
 
-from database import engine, Base
+from admission import AdmissionMiddleware, admission_stats
+from cache import cache
+from compression import CompressionMiddleware
+from database import SLOW_QUERY_MS, async_engine, engine, pool_status
+from metrics import CONTENT_TYPE, MetricsMiddleware, instrument_engine, registry
+from responses import UTCJSONResponse
+from slow_query import RequestScopeMiddleware
+from startup import STARTUP_DB, prepare_database
 
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 logger.info("Starting application...")
 
+# Importing this module touches no database; schema checks run in the lifespan.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await prepare_database(STARTUP_DB)
+    yield
+    await async_engine.dispose()
+    engine.dispose()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="ExperaAPI",
     description="API for managing user portfolios",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=UTCJSONResponse
 )
 
+# Innermost, so CORS and compression still apply to its 503/429 responses
+app.add_middleware(AdmissionMiddleware, subject=token_subject)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -30,12 +50,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After"],
 )
+app.add_middleware(CompressionMiddleware)
+if SLOW_QUERY_MS > 0:
+    app.add_middleware(RequestScopeMiddleware)
+# Outermost, so latency includes compression and admission rejections are counted
+app.add_middleware(MetricsMiddleware)
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+registry.gauges("db_pool", pool_status)
+registry.gauges("cache", cache.stats)
+registry.gauges("admission", admission_stats)
+registry.gauges("admission", lambda: admission_stats()["groups"], label="group")
 
 # Include all routers
 app.include_router(UserRoute)
 app.include_router(RestaurantRoute)
 app.include_router(HolidayRoute)
+app.include_router(AdminRoute)
 
 logger.info("All routers registered successfully")
 
@@ -53,6 +87,22 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/db")
+async def db_health_check():
+    return pool_status()
+
+@app.get("/health/cache")
+async def cache_health_check():
+    return cache.stats()
+
+@app.get("/health/admission")
+async def admission_health_check():
+    return admission_stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,232 @@
+import bisect
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# Prometheus text exposition, kept in process without a client library so
+# recording a sample stays a dict lookup and a list increment.
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+OPENAI_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(labels)
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+        self._gauges: List[Tuple[str, Callable[[], dict], Optional[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def gauges(self, prefix: str, snapshot: Callable[[], dict], label: Optional[str] = None) -> None:
+        """Expose the numeric values of ``snapshot()`` as ``<prefix>_<key>`` gauges.
+
+        With ``label``, ``snapshot()`` maps a label value to such a dict, e.g.
+        one entry per admission route group.
+        """
+        self._gauges.append((prefix, snapshot, label))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, snapshot, label in self._gauges:
+            data = snapshot()
+            rows = data.items() if label else [(None, data)]
+            samples: Dict[str, List[str]] = {}
+            for label_value, values in rows:
+                for key, value in values.items():
+                    if isinstance(value, bool) or not isinstance(value, (int, float)):
+                        continue
+                    labels = _labels((label,), (label_value,)) if label else ""
+                    samples.setdefault(f"{prefix}_{key}", []).append(f"{prefix}_{key}{labels} {value}")
+            for name, series in samples.items():
+                lines.append(f"# TYPE {name} gauge")
+                lines.extend(series)
+        return "\n".join(lines) + "\n"
+
+
+class RequestMetrics:
+    """Latency, status, statement count and DB time per (method, route).
+
+    One dict lookup and no lock per request: it is only touched from the
+    event loop, by MetricsMiddleware and by render().
+    """
+
+    def __init__(self):
+        self.label_names = ("method", "route")
+        # labels -> [duration counts, duration sum, statement counts, statement sum,
+        #            db counts, db sum, {status: count}]
+        self._series: Dict[tuple, list] = {}
+
+    def record(self, labels: tuple, seconds: float, status: int, statements: int, db_seconds: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [
+                [0] * (len(REQUEST_BUCKETS) + 1), 0.0,
+                [0] * (len(STATEMENT_BUCKETS) + 1), 0,
+                [0] * (len(SQL_BUCKETS) + 1), 0.0,
+                {},
+            ]
+        series[0][bisect.bisect_left(REQUEST_BUCKETS, seconds)] += 1
+        series[1] += seconds
+        series[2][bisect.bisect_left(STATEMENT_BUCKETS, statements)] += 1
+        series[3] += statements
+        series[4][bisect.bisect_left(SQL_BUCKETS, db_seconds)] += 1
+        series[5] += db_seconds
+        series[6][status] = series[6].get(status, 0) + 1
+
+    def render(self) -> List[str]:
+        names = self.label_names
+        lines = [
+            "# HELP http_requests_total Requests served, by route template and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for labels, series in list(self._series.items()):
+            for status, count in series[6].items():
+                lines.append(f"http_requests_total{_labels((*names, 'status'), (*labels, status))} {count}")
+        for index, (name, help, buckets) in enumerate((
+            ("http_request_duration_seconds", "Time until the last response byte was sent.", REQUEST_BUCKETS),
+            ("http_request_sql_statements", "SQL statements sent per request.", STATEMENT_BUCKETS),
+            ("http_request_db_seconds", "Time spent waiting on SQL statements per request.", SQL_BUCKETS),
+        )):
+            histogram = Histogram(name, help, buckets, names)
+            histogram._series = {
+                labels: [series[2 * index], series[2 * index + 1]] for labels, series in self._series.items()
+            }
+            lines.extend(histogram.render())
+        return lines
+
+
+registry = Registry()
+
+http_requests = registry.register(RequestMetrics())
+sql_duration = registry.register(Histogram(
+    "sql_statement_duration_seconds", "Duration of every SQL statement, inside a request or not.", SQL_BUCKETS
+))
+openai_duration = registry.register(Histogram(
+    "openai_request_duration_seconds", "Assistant run latency (add_message or stream_message), by outcome.",
+    OPENAI_BUCKETS, ("status",)
+))
+openai_first_token = registry.register(Histogram(
+    "openai_first_token_seconds", "Time from stream_message to its first text delta.", OPENAI_BUCKETS
+))
+
+# [statements, db seconds] of the request being served, if any.
+_request_sql: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("request_sql", default=None)
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+    sql_duration.observe(elapsed)
+    current = _request_sql.get()
+    if current is not None:
+        current[0] += 1
+        current[1] += elapsed
+
+
+def _on_error(exception_context):
+    # after_cursor_execute does not fire for a failed statement.
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("metrics_started"):
+        conn.info["metrics_started"].pop()
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement on a (sync) engine; for async engines pass ``.sync_engine``."""
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+    event.listen(engine, "handle_error", _on_error)
+
+
+class MetricsMiddleware:
+    """Record latency, status and SQL work per route template.
+
+    Routes are labelled by their path template (``/holidays/{holiday_id}``)
+    so the series count stays bounded; paths no route matched share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        sql = [0, 0.0]
+        token = _request_sql.set(sql)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_sql.reset(token)
+            route = scope.get("route")
+            http_requests.record(
+                (scope["method"], getattr(route, "path", "unmatched")),
+                time.perf_counter() - start, status, sql[0], sql[1],
+            )
@@ -1,42 +1,53 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, JSON, DateTime, Float, Time
-from sqlalchemy.ext.mutable import MutableDict
+from sqlalchemy import Column, Computed, Date, DDL, ForeignKey, Index, Integer, String, JSON, DateTime, Float, Time, event, select
+from sqlalchemy.dialects.postgresql import INT4MULTIRANGE, TSVECTOR
+from sqlalchemy.orm import column_property, deferred, relationship
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 from database import Base
+from geo import GEO_CELL_SQL
+from guest_counts import COUNT_TRIGGERS, CURRENT_COUNT_FUNCTION
 from sqlalchemy.sql import func
 
 
 class Holiday(Base):
     __tablename__ = 'holidays'
+    __table_args__ = (
+        Index('ix_holidays_geo_cell', 'geo_cell'),
+    )
 
     id = Column(Integer, primary_key=True)
     theme = Column(String, nullable=False)
-    guests_count = Column(Integer, default=0)
-    guests = Column(MutableDict.as_mutable(JSONB), default=dict)
     
     details = Column(String, nullable=False)
     # Простое хранение координат
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
     location_address = Column(String, nullable=True)
+    # Grid cell of (latitude, longitude), generated by Postgres; see geo.py.
+    geo_cell = deferred(Column(Integer, Computed(GEO_CELL_SQL, persisted=True)))
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Not stored: HolidayService fills these in from the guests table and
+    # holiday_guest_counts, e.g.
+    # guests = {"confirmed": [{"name": "Иван", "telegram_id": "42"}], "pending": [{"name": "Петр"}]}
+    # status_counts = {"confirmed": 1, "pending": 1}
+    guests = None
+    status_counts = None
+
+    # Full guest rows. Never lazy loaded: ask for it with selectinload().
+    guest_list = relationship(
+        "Guest",
+        back_populates="holiday",
+        order_by="Guest.id",
+        lazy="raise",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
     def __repr__(self):
         return f"<Holiday(id={self.id}, theme='{self.theme}', guests_count={self.guests_count})>"
-    
-    # Пример структуры guests:
-    # {
-    #     "confirmed": [
-    #         {"name": "Иван", "phone": "+7999999999"},
-    #         {"name": "Мария", "phone": "+7888888888"}
-    #     ],
-    #     "pending": [
-    #         {"name": "Петр", "phone": "+7777777777"}
-    #     ]
-    # }
 
 
 class User(Base):
@@ -50,8 +61,29 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
+MINUTES_IN_DAY = 24 * 60
+
+# Minute-of-day ranges a restaurant is open. A schedule crossing midnight
+# becomes two ranges and open == close means around the clock.
+OPEN_MINUTES_SQL = (
+    "CASE "
+    "WHEN schedule_open = schedule_close THEN int4multirange(int4range(0, 1440)) "
+    "WHEN schedule_open < schedule_close THEN int4multirange(int4range("
+    "(EXTRACT(HOUR FROM schedule_open) * 60 + EXTRACT(MINUTE FROM schedule_open))::int, "
+    "(EXTRACT(HOUR FROM schedule_close) * 60 + EXTRACT(MINUTE FROM schedule_close))::int)) "
+    "ELSE int4multirange("
+    "int4range((EXTRACT(HOUR FROM schedule_open) * 60 + EXTRACT(MINUTE FROM schedule_open))::int, 1440), "
+    "int4range(0, (EXTRACT(HOUR FROM schedule_close) * 60 + EXTRACT(MINUTE FROM schedule_close))::int)) "
+    "END"
+)
+
+
 class Restaurant(Base):
     __tablename__ = 'restaurants'
+    __table_args__ = (
+        Index('ix_restaurants_open_minutes', 'open_minutes', postgresql_using='gist'),
+        Index('ix_restaurants_search_vector', 'search_vector', postgresql_using='gin'),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
@@ -59,21 +91,122 @@ class Restaurant(Base):
     menu = Column(JSON, nullable=False)
     schedule_open = Column(Time, nullable=False)
     schedule_close = Column(Time, nullable=False)
+    # Generated by Postgres from the schedule; only used in WHERE clauses.
+    open_minutes = deferred(Column(INT4MULTIRANGE, Computed(OPEN_MINUTES_SQL, persisted=True)))
+    # Name, menu strings and address, maintained by the restaurants_search_vector trigger.
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
 
     def __repr__(self):
         return f"<Restaurant(name='{self.name}', address='{self.address}')>"
 
 
+SEARCH_CONFIG = 'russian'
+
+# Same definition as migration 7442ed57c4da, so create_all() installs it too.
+RESTAURANT_SEARCH_DDL = [
+    DDL(f"""
+CREATE OR REPLACE FUNCTION restaurants_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.name, '')), 'A') ||
+        setweight(jsonb_to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.menu::jsonb, '{{}}'), '["string"]'), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.address, '')), 'C');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""),
+    DDL("CREATE TRIGGER restaurants_search_vector BEFORE INSERT OR UPDATE OF name, address, menu "
+        "ON restaurants FOR EACH ROW EXECUTE FUNCTION restaurants_search_vector()"),
+]
+
+for ddl in RESTAURANT_SEARCH_DDL:
+    event.listen(Restaurant.__table__, "after_create", ddl.execute_if(dialect="postgresql"))
+
+
 class Guest(Base):
     __tablename__ = 'guests'
+    __table_args__ = (
+        # Serves per-holiday guest lists, status filters and the FK cascade.
+        Index('ix_guests_holiday_id_status', 'holiday_id', 'status'),
+    )
     
     id = Column(Integer, primary_key=True)
     holiday_id = Column(Integer, ForeignKey('holidays.id', ondelete='CASCADE'), nullable=False)
     name = Column(String, nullable=False)
-    telegram_id = Column(String, nullable=True)
-    status = Column(String, default='pending')  # present, absent, pending
+    telegram_id = Column(String, nullable=True, index=True)
+    status = Column(String, nullable=False, default='pending', server_default='pending')  # present, absent, pending
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    holiday = relationship("Holiday", back_populates="guest_list", lazy="raise")
+
     def __repr__(self):
-        return f"<Guest(id={self.id}, name='{self.name}', status='{self.status}')>"
\ No newline at end of file
+        return f"<Guest(id={self.id}, name='{self.name}', status='{self.status}')>"
+
+
+class HolidayGuestCount(Base):
+    """Number of guests per (holiday, status), kept current by a trigger on guests.
+
+    ``version`` goes up with every write to a guest in that (holiday, status),
+    including ones that leave ``count`` unchanged.
+    """
+    __tablename__ = 'holiday_guest_counts'
+
+    holiday_id = Column(Integer, ForeignKey('holidays.id', ondelete='CASCADE'), primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0, server_default='0')
+    version = Column(Integer, nullable=False, default=0, server_default='0')
+
+
+# Derived from holiday_guest_counts, so RSVPs never write (or lock) the holidays
+# row. Each is one primary-key range read of a handful of rows per holiday.
+Holiday.guests_count = column_property(
+    select(func.coalesce(func.sum(HolidayGuestCount.count), 0))
+    .where(HolidayGuestCount.holiday_id == Holiday.id)
+    .correlate_except(HolidayGuestCount)
+    .scalar_subquery()
+)
+# Changes with every write to the holiday's guests; part of its ETag.
+Holiday.guests_version = column_property(
+    select(func.coalesce(func.sum(HolidayGuestCount.version), 0))
+    .where(HolidayGuestCount.holiday_id == Holiday.id)
+    .correlate_except(HolidayGuestCount)
+    .scalar_subquery(),
+    deferred=True,
+)
+
+
+class GuestStatusTotal(Base):
+    """Guests per status across all holidays, spread over GUEST_STATS_SHARDS
+    rows by ``holiday_id % GUEST_STATS_SHARDS``; kept current by a trigger on guests."""
+    __tablename__ = 'guest_status_totals'
+
+    status = Column(String, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0, server_default='0')
+
+
+class GuestActivity(Base):
+    """Guests per (UTC day of updated_at, status) across all holidays, sharded
+    like GuestStatusTotal; kept current by a trigger on guests."""
+    __tablename__ = 'guest_activity'
+
+    day = Column(Date, primary_key=True)
+    status = Column(String, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0, server_default='0')
+
+
+# Statement-level triggers fold every INSERT/UPDATE/DELETE on guests into
+# set-based upserts of the summary tables; see guest_counts.py. Rows touched
+# are either the changed guests' holiday's own or one shard of the global
+# figures, so RSVPs on different holidays rarely wait on each other.
+# create_all() installs the current body.
+GUEST_COUNT_DDL = [
+    # DDL() %-formats its statement.
+    DDL(CURRENT_COUNT_FUNCTION.replace("%", "%%")),
+    *(DDL(trigger) for trigger in COUNT_TRIGGERS),
+]
+
+for ddl in GUEST_COUNT_DDL:
+    event.listen(HolidayGuestCount.__table__, "after_create", ddl.execute_if(dialect="postgresql"))
\ No newline at end of file
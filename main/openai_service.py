@@ -1,10 +1,12 @@
 from openai import AsyncOpenAI, OpenAIError
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 import logging
 from datetime import datetime
 import json
+import time
 from env import ASSISTANT_ID, OPENAI_API_KEY
+from metrics import openai_duration, openai_first_token
 
 logging.basicConfig(
     level=logging.INFO,
@@ -51,10 +53,10 @@ class OpenAIAsyncClient:
             logger.error(f"Error loading function prompts: {str(e)}")
             raise
 
-    async def create_thread(self, message: str) -> str:
+    async def create_thread(self, message: Optional[str] = None) -> str:
         try:
             thread = await self.client.beta.threads.create(
-                messages=[{"role": "user", "content": message}]
+                messages=[{"role": "user", "content": message}] if message else []
             )
             return thread.id
         except Exception as e:
@@ -74,30 +76,35 @@ class OpenAIAsyncClient:
             logger.error(f"Error calling function: {str(e)}")
             raise
 
+    async def run_tool_calls(self, thread_id: str, run) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
+        tool_outputs = []
+        function_details = []
+        for tool_call in run.required_action.submit_tool_outputs.tool_calls:
+            function_name = tool_call.function.name
+            function_args = json.loads(tool_call.function.arguments)
+            
+            logger.info(f"Calling function {function_name} for run in thread {thread_id}")
+            
+            function_response = await self.call_function(function_name, function_args)
+            
+            tool_outputs.append({
+                "tool_call_id": tool_call.id,
+                "output": function_response
+            })
+            
+            function_details.append({
+                "name": function_name,
+                "arguments": function_args,
+                "response": function_response,
+            })
+        return tool_outputs, function_details
+
     async def handle_run_actions(self, thread_id: str, run) -> Dict[str, Any]:
         function_details = []
         while run.status == "requires_action":
             logger.info(f"Run for thread {thread_id} requires action")
-            tool_outputs = []
-            
-            for tool_call in run.required_action.submit_tool_outputs.tool_calls:
-                function_name = tool_call.function.name
-                function_args = json.loads(tool_call.function.arguments)
-                
-                logger.info(f"Calling function {function_name} for run in thread {thread_id}")
-                
-                function_response = await self.call_function(function_name, function_args)
-                
-                tool_outputs.append({
-                    "tool_call_id": tool_call.id,
-                    "output": function_response
-                })
-                
-                function_details.append({
-                    "name": function_name,
-                    "arguments": function_args,
-                    "response": function_response,
-                })
+            tool_outputs, details = await self.run_tool_calls(thread_id, run)
+            function_details.extend(details)
                 
             logger.info(f"Submitting tool outputs for run in thread {thread_id}")
             run = await self.client.beta.threads.runs.submit_tool_outputs_and_poll(
@@ -109,6 +116,7 @@ class OpenAIAsyncClient:
         return {"run": run, "function_details": function_details}
 
     async def add_message(self, thread_id: str, message: str) -> Dict[str, Any]:
+        started = time.perf_counter()
         try:
             start_time = datetime.now()
             
@@ -151,10 +159,12 @@ class OpenAIAsyncClient:
             }
             
             logger.info(f"Processed message in {duration:.2f}s with status: {result['status']}")
+            openai_duration.observe(time.perf_counter() - started, (run.status,))
             return result
             
         except Exception as e:
             logger.error(f"Error in add_message: {str(e)}")
+            openai_duration.observe(time.perf_counter() - started, ("failed",))
             return {
                 "status": "failed",
                 "content": str(e),
@@ -163,6 +173,70 @@ class OpenAIAsyncClient:
                 "function_details": []
             }
 
+    async def stream_message(self, thread_id: str, message: str) -> AsyncIterator[str]:
+        """Add ``message`` to the thread and yield the assistant's reply as text deltas.
+
+        Built on the Assistants streaming events instead of create_and_poll,
+        so the first words arrive as soon as the model produces them. Tool
+        calls are answered in between and the reply continues on the stream
+        returned by submit_tool_outputs_stream. Unlike add_message, errors are
+        raised to the caller, which may already have shown part of the reply.
+        """
+        started = time.perf_counter()
+        first_token = None
+        status = "failed"
+        try:
+            if not message or not isinstance(message, str):
+                raise ValueError("Invalid message format")
+
+            await self.client.beta.threads.messages.create(
+                thread_id=thread_id,
+                role="user",
+                content=message
+            )
+
+            manager = self.client.beta.threads.runs.stream(
+                thread_id=thread_id,
+                assistant_id=ASSISTANT_ID
+            )
+            while manager is not None:
+                async with manager as stream:
+                    manager = None
+                    async for event in stream:
+                        if event.event == "thread.message.delta":
+                            for part in event.data.delta.content or []:
+                                if part.type == "text" and part.text and part.text.value:
+                                    if first_token is None:
+                                        first_token = time.perf_counter() - started
+                                        openai_first_token.observe(first_token)
+                                    yield part.text.value
+                        elif event.event == "thread.run.requires_action":
+                            run = event.data
+                            logger.info(f"Run for thread {thread_id} requires action")
+                            tool_outputs, function_details = await self.run_tool_calls(thread_id, run)
+                            logger.info(f"Functions called: {function_details}")
+                            manager = self.client.beta.threads.runs.submit_tool_outputs_stream(
+                                thread_id=thread_id,
+                                run_id=run.id,
+                                tool_outputs=tool_outputs
+                            )
+                            break
+                        elif event.event in ("thread.run.failed", "thread.run.cancelled", "thread.run.expired"):
+                            status = event.data.status
+                            error = event.data.last_error.message if event.data.last_error else status
+                            raise OpenAIError(f"Run {status}: {error}")
+                        elif event.event in ("thread.run.completed", "thread.run.incomplete"):
+                            status = event.data.status
+
+            duration = time.perf_counter() - started
+            first = f"{first_token:.2f}s" if first_token is not None else "-"
+            logger.info(f"Streamed message in {duration:.2f}s (first token {first}) with status: {status}")
+        except Exception as e:
+            logger.error(f"Error in stream_message: {str(e)}")
+            raise
+        finally:
+            openai_duration.observe(time.perf_counter() - started, (status,))
+
     async def process_and_poll(self, message: str, thread_id: Optional[str] = None) -> Dict[str, Any]:
         try:
             if thread_id:
@@ -0,0 +1,104 @@
+import base64
+import json
+import os
+from typing import Generic, List, Literal, Optional, TypeVar
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+class PageParams:
+    """Query parameters shared by every list endpoint.
+
+    ``pagination=offset`` (the default) keeps the old ``skip``/``limit``
+    behaviour and returns a bare list. ``pagination=cursor``, or passing a
+    ``cursor``, switches to keyset pagination and returns a ``Page``.
+    """
+
+    def __init__(
+        self,
+        pagination: Literal["offset", "cursor"] = "offset",
+        cursor: Optional[str] = None,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        self.keyset = pagination == "cursor" or cursor is not None
+        self.cursor = cursor
+        self.skip = skip
+        self.limit = limit
+
+
+def encode_cursor(value) -> str:
+    raw = json.dumps([value], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, expected: Optional[type] = None):
+    """The value encoded in ``cursor``, which must be an ``expected`` (int or str).
+
+    Anything else is answered with 400, so a forged cursor can't reach the
+    database with a value of the wrong type.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        (value,) = json.loads(base64.urlsafe_b64decode(padded))
+        if isinstance(value, bool) or not isinstance(value, expected or (int, str)):
+            raise ValueError(cursor)
+        return value
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _key_type(key) -> Optional[type]:
+    try:
+        python_type = key.type.python_type
+    except NotImplementedError:
+        return None
+    return python_type if python_type in (int, str) else None
+
+
+async def paginate(db, stmt, key, params: PageParams, scalars: bool = True):
+    """Run ``stmt`` one page at a time, ordered by the unique column ``key``.
+
+    Keyset mode seeks past the last key of the previous page, so deep pages
+    cost the same as the first one. ``scalars=False`` returns Row objects,
+    for statements that select several columns; ``key`` must be one of them.
+    """
+    stmt = stmt.order_by(key)
+    if not params.keyset:
+        result = await db.execute(stmt.offset(params.skip).limit(params.limit))
+        return (result.scalars() if scalars else result).all()
+
+    if params.cursor:
+        stmt = stmt.where(key > decode_cursor(params.cursor, _key_type(key)))
+    result = await db.execute(stmt.limit(params.limit + 1))
+    rows = (result.scalars() if scalars else result).all()
+
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        next_cursor = encode_cursor(getattr(rows[-1], key.key))
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+def as_dicts(page):
+    """Plain dicts for the Row objects of a ``paginate(..., scalars=False)`` result.
+
+    List endpoints return these straight to UTCJSONResponse, skipping
+    per-row model validation.
+    """
+    if isinstance(page, dict):
+        return {"items": [dict(row._mapping) for row in page["items"]], "next_cursor": page["next_cursor"]}
+    return [dict(row._mapping) for row in page]
@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+from typing import List
+
+from sqlalchemy import event
+
+from database import async_engine, engine
+
+# Statement counting for round-trip tests (tests/test_query_counts.py). Per-request
+# counts in production come from the http_request_sql_statements histogram.
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+# Counters that see every statement on either engine, whatever task sent it.
+_global: List[QueryCounter] = []
+
+
+def _on_execute(conn, cursor, statement, parameters, context, executemany):
+    for counter in _global:
+        counter.statements.append(statement)
+
+
+for _engine in (engine, async_engine.sync_engine):
+    event.listen(_engine, "before_cursor_execute", _on_execute)
+
+
+@contextmanager
+def assert_num_queries(expected: int):
+    """Fail unless exactly ``expected`` statements run inside the block.
+
+    Counts every statement on both engines, so it also sees the queries of
+    a request served by TestClient on its own event loop:
+
+        with assert_num_queries(2):
+            client.put("/holidays/1", json={"theme": "New year"})
+    """
+    counter = QueryCounter()
+    _global.append(counter)
+    try:
+        yield counter
+    finally:
+        _global.remove(counter)
+    if counter.count != expected:
+        listing = "\n".join(f"  {' '.join(s.split())[:200]}" for s in counter.statements)
+        raise AssertionError(f"Expected {expected} queries, got {counter.count}:\n{listing}")
+
@@ -0,0 +1,16 @@
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+class UTCJSONResponse(ORJSONResponse):
+    """ORJSONResponse that writes UTC datetimes with a ``Z`` suffix, as pydantic does.
+
+    List endpoints hand plain dicts straight to orjson while detail endpoints
+    go through their response_model; this keeps the two byte-compatible.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z,
+        )
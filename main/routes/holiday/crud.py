@@ -1,15 +1,99 @@
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import JSON, Integer, String, bindparam, delete, func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, undefer
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import AsyncIterable, Iterable, List, Dict, Optional, Sequence, Tuple
+
+from cache import cache
+from etag import weak_etag
+from geo import cell_ranges, haversine_km
+from models import Guest, GuestActivity, GuestStatusTotal, Holiday, HolidayGuestCount
+from pagination import PageParams, as_dicts, paginate
+
+EXPORT_BATCH_SIZE = 1000
+
+# The status counted as having attended, for attendance rates.
+ATTENDED_STATUS = "present"
+
+# What a HolidayResponse depends on: the row itself and, through the version
+# the guests trigger bumps on every guest write, the derived guest lists.
+HOLIDAY_VERSION_COLUMNS = (Holiday.id, Holiday.updated_at, Holiday.guests_version)
+
+
+def holiday_cache_key(holiday_id: int, include_guests: bool = False) -> str:
+    """Cache key of a holiday's ``{"etag", "body"}`` entry for one ``include``.
+
+    Unversioned, so GET /holidays/{id} answers a hit (a 304 included)
+    without a query. Every write that changes the body invalidates it after
+    committing; with the memory backend other workers keep their copy until
+    CACHE_TTL_SECONDS, which bounds how stale it can be.
+    """
+    return f"holiday:{holiday_id}:guests" if include_guests else f"holiday:{holiday_id}"
+
+
+def holiday_cache_keys(*holiday_ids: int) -> List[str]:
+    """Every cached entry of the given holidays, for invalidation."""
+    return [holiday_cache_key(holiday_id, include_guests)
+            for holiday_id in holiday_ids for include_guests in (False, True)]
+
+
+def holiday_etag(holiday: Holiday, include_guests: bool = False) -> str:
+    """ETag of a loaded holiday, from its HOLIDAY_VERSION_COLUMNS."""
+    return weak_etag(holiday.id, holiday.updated_at, holiday.guests_version, include_guests)
+
+
+# The stored fields of HolidayResponse; also what exports contain. guests_count
+# is a subquery, labelled so RETURNING and plain selects name it alike.
+HOLIDAY_COLUMNS = (
+    Holiday.id, Holiday.theme, Holiday.details, Holiday.latitude, Holiday.longitude,
+    Holiday.location_address, Holiday.guests_count.label("guests_count"),
+    Holiday.created_at, Holiday.updated_at,
+)
+# The fields of GuestResponse; also what guest exports contain.
+GUEST_EXPORT_COLUMNS = (
+    Guest.id, Guest.holiday_id, Guest.name, Guest.telegram_id, Guest.status,
+    Guest.created_at, Guest.updated_at,
+)
+
+
+def group_guests(rows: Iterable[Tuple[str, str, Optional[str]]]) -> Tuple[Dict[str, List[dict]], Dict[str, int]]:
+    """The ``guests`` and ``status_counts`` of a holiday from its ``(status, name, telegram_id)`` rows."""
+    guests: Dict[str, List[dict]] = {}
+    for status, name, telegram_id in rows:
+        guest_info = {"name": name}
+        if telegram_id:
+            guest_info["telegram_id"] = telegram_id
+        guests.setdefault(status, []).append(guest_info)
+    return guests, {status: len(items) for status, items in guests.items()}
+
+
+def _guest_rows(guest_list: Sequence[Guest]):
+    return ((guest.status, guest.name, guest.telegram_id) for guest in guest_list)
+
+
+def _status_summary(by_status: Dict[str, int]) -> dict:
+    guests = sum(by_status.values())
+    return {
+        "guests": guests,
+        "by_status": by_status,
+        "attendance_rate": round(by_status.get(ATTENDED_STATUS, 0) / guests, 4) if guests else 0.0,
+    }
+
+
+async def _stream_partitions(db, stmt, batch_size: int):
+    """Yield lists of row tuples from a server-side cursor, ``batch_size`` at a time."""
+    result = await db.stream(stmt.execution_options(yield_per=batch_size))
+    async for rows in result.partitions(batch_size):
+        yield rows
 
-from models import Guest, Holiday
 
 class HolidayService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_holiday(
+    async def create_holiday(
         self,
         theme: str,
         details: str,
@@ -23,24 +107,197 @@ class HolidayService:
                 details=details,
                 latitude=latitude,
                 longitude=longitude,
-                location_address=location_address,
-                guests={"confirmed": [], "pending": []}
+                location_address=location_address
             )
             self.db.add(holiday)
-            self.db.commit()
-            self.db.refresh(holiday)
+            await self.db.commit()
+            await self.db.refresh(holiday)
+            holiday.guests = {}
+            holiday.status_counts = {}
             return holiday
         except SQLAlchemyError as e:
-            self.db.rollback()
+            await self.db.rollback()
             raise Exception(f"Error creating holiday: {str(e)}")
 
-    def get_holiday(self, holiday_id: int) -> Optional[Holiday]:
-        return self.db.query(Holiday).filter(Holiday.id == holiday_id).first()
+    async def guest_details(self, holiday_ids) -> Tuple[Dict[int, dict], Dict[int, dict]]:
+        """Guest lists by status and status counts for each of ``holiday_ids``.
+
+        Two queries per call however many holidays are passed.
+        """
+        guests: Dict[int, dict] = {holiday_id: {} for holiday_id in holiday_ids}
+        counts: Dict[int, dict] = {holiday_id: {} for holiday_id in holiday_ids}
+        if not guests:
+            return guests, counts
+
+        rows = await self.db.execute(
+            select(Guest.holiday_id, Guest.status, Guest.name, Guest.telegram_id)
+            .where(Guest.holiday_id.in_(guests))
+            .order_by(Guest.id)
+        )
+        for holiday_id, status, name, telegram_id in rows:
+            guest_info = {"name": name}
+            if telegram_id:
+                guest_info["telegram_id"] = telegram_id
+            guests[holiday_id].setdefault(status, []).append(guest_info)
+
+        rows = await self.db.execute(
+            select(HolidayGuestCount.holiday_id, HolidayGuestCount.status, HolidayGuestCount.count)
+            .where(HolidayGuestCount.holiday_id.in_(counts), HolidayGuestCount.count > 0)
+        )
+        for holiday_id, status, count in rows:
+            counts[holiday_id][status] = count
+        return guests, counts
+
+    async def load_guests(self, holidays: List[Holiday]) -> List[Holiday]:
+        """Fill the derived ``guests`` and ``status_counts`` of each holiday."""
+        guests, counts = await self.guest_details([holiday.id for holiday in holidays])
+        for holiday in holidays:
+            holiday.guests = guests[holiday.id]
+            holiday.status_counts = counts[holiday.id]
+        return holidays
+
+    async def get_holiday(self, holiday_id: int, include_guests: bool = False) -> Optional[Holiday]:
+        """A holiday with its derived guest fields and ``guests_version``;
+        ``include_guests`` also loads ``guest_list``, from which those fields
+        are then built (two queries)."""
+        stmt = select(Holiday).where(Holiday.id == holiday_id).options(undefer(Holiday.guests_version))
+        if include_guests:
+            stmt = stmt.options(selectinload(Holiday.guest_list))
+        result = await self.db.execute(stmt)
+        holiday = result.scalars().first()
+        if holiday is None:
+            return None
+        if include_guests:
+            holiday.guests, holiday.status_counts = group_guests(_guest_rows(holiday.guest_list))
+        else:
+            await self.load_guests([holiday])
+        return holiday
+
+    async def get_stats(self, days: int, bucket: str, holiday_id: Optional[int] = None) -> Optional[dict]:
+        """Guest totals by status, RSVP activity over the last ``days`` days and,
+        for ``holiday_id``, that holiday's breakdown.
+
+        Everything is read from the trigger-maintained summary tables. Global
+        figures are kept in GUEST_STATS_SHARDS rows per status and per (day,
+        status), so this reads at most GUEST_STATS_SHARDS x statuses x (days + 1)
+        rows plus the holiday's own few: bounded by the window asked for,
+        whatever the number of holidays and guests.
+        """
+        totals = await self.db.execute(
+            select(GuestStatusTotal.status, func.sum(GuestStatusTotal.count))
+            .group_by(GuestStatusTotal.status)
+            .having(func.sum(GuestStatusTotal.count) > 0)
+        )
+        stats = _status_summary(dict(totals.all()))
+
+        period = func.date_trunc(bucket, GuestActivity.day).label("period")
+        activity = await self.db.execute(
+            select(period, GuestActivity.status, func.sum(GuestActivity.count))
+            .where(GuestActivity.day > func.current_date() - days)
+            .group_by(period, GuestActivity.status)
+            .having(func.sum(GuestActivity.count) > 0)
+            .order_by(period)
+        )
+        buckets: Dict[datetime, Dict[str, int]] = {}
+        for start, status, count in activity:
+            buckets.setdefault(start, {})[status] = count
+        stats["activity"] = [
+            {"start": start.date(), "total": sum(by_status.values()), "by_status": by_status}
+            for start, by_status in buckets.items()
+        ]
+
+        if holiday_id is not None:
+            if not await self.holiday_exists(holiday_id):
+                return None
+            counts = await self.db.execute(
+                select(HolidayGuestCount.status, HolidayGuestCount.count)
+                .where(HolidayGuestCount.holiday_id == holiday_id, HolidayGuestCount.count > 0)
+            )
+            stats["holiday"] = {"id": holiday_id, **_status_summary(dict(counts.all()))}
+        return stats
+
+    async def holiday_exists(self, holiday_id: int) -> bool:
+        return await self.db.scalar(select(Holiday.id).where(Holiday.id == holiday_id)) is not None
+
+    async def holidays_page_etag(self, params: PageParams, include_guests: bool = False) -> str:
+        page = await paginate(
+            self.db, select(*HOLIDAY_VERSION_COLUMNS), Holiday.id, params, scalars=False
+        )
+        if params.keyset:
+            return weak_etag([tuple(row) for row in page["items"]], page["next_cursor"], include_guests)
+        return weak_etag([tuple(row) for row in page], include_guests)
+
+    async def get_all_holidays(self, params: PageParams, include_guests: bool = False):
+        """A page of holidays as plain dicts shaped like HolidayResponse.
 
-    def get_all_holidays(self) -> List[Holiday]:
-        return self.db.query(Holiday).all()
+        With ``include_guests`` each also carries its ``guest_list``; the
+        page then costs two queries whatever its size.
+        """
+        if include_guests:
+            return await self._holidays_with_guests(params)
+        page = as_dicts(await paginate(
+            self.db, select(*HOLIDAY_COLUMNS), Holiday.id, params, scalars=False
+        ))
+        items = page["items"] if params.keyset else page
+        guests, counts = await self.guest_details([item["id"] for item in items])
+        for item in items:
+            item["guests"] = guests[item["id"]]
+            item["status_counts"] = counts[item["id"]]
+        return page
 
-    def update_holiday(
+    async def _holidays_with_guests(self, params: PageParams):
+        page = await paginate(
+            self.db, select(Holiday).options(selectinload(Holiday.guest_list)), Holiday.id, params
+        )
+
+        def as_dict(holiday: Holiday) -> dict:
+            item = {column.key: getattr(holiday, column.key) for column in HOLIDAY_COLUMNS}
+            item["guests"], item["status_counts"] = group_guests(_guest_rows(holiday.guest_list))
+            item["guest_list"] = [
+                {column.key: getattr(guest, column.key) for column in GUEST_EXPORT_COLUMNS}
+                for guest in holiday.guest_list
+            ]
+            return item
+
+        if params.keyset:
+            return {"items": [as_dict(h) for h in page["items"]], "next_cursor": page["next_cursor"]}
+        return [as_dict(h) for h in page]
+
+    async def nearby_holidays(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: int
+    ) -> List[Holiday]:
+        """Up to ``limit`` holidays within ``radius_km``, nearest first.
+
+        The grid cells covering the search circle are range scans on
+        ix_holidays_geo_cell; only the rows they return are measured.
+        Each result gets a ``distance_km`` attribute.
+        """
+        distance = haversine_km(Holiday.latitude, Holiday.longitude, latitude, longitude)
+        cells = or_(*(
+            Holiday.geo_cell.between(first, last)
+            for first, last in cell_ranges(latitude, longitude, radius_km)
+        ))
+        result = await self.db.execute(
+            select(Holiday, distance.label("distance_km"))
+            .where(cells, distance <= radius_km)
+            .order_by(distance, Holiday.id)
+            .limit(limit)
+        )
+        holidays = []
+        for holiday, distance_km in result:
+            holiday.distance_km = round(distance_km, 3)
+            holidays.append(holiday)
+        return await self.load_guests(holidays)
+
+    def stream_holidays(self, batch_size: int = EXPORT_BATCH_SIZE):
+        stmt = select(*HOLIDAY_COLUMNS).order_by(Holiday.id)
+        return _stream_partitions(self.db, stmt, batch_size)
+
+    async def update_holiday(
         self,
         holiday_id: int,
         theme: Optional[str] = None,
@@ -48,55 +305,76 @@ class HolidayService:
         latitude: Optional[float] = None,
         longitude: Optional[float] = None,
         location_address: Optional[str] = None
-    ) -> Optional[Holiday]:
-        holiday = self.get_holiday(holiday_id)
-        if not holiday:
-            return None
+    ) -> Optional[dict]:
+        """Apply the non-None fields; None if no such holiday.
 
+        One statement: the UPDATE ... RETURNING runs in a CTE and the same
+        SELECT aggregates the holiday's guests, from which the derived
+        fields of the returned HolidayResponse-shaped dict are built.
+        """
+        changes = {
+            "theme": theme,
+            "details": details,
+            "latitude": latitude,
+            "longitude": longitude,
+            "location_address": location_address,
+        }
+        values = {field: value for field, value in changes.items() if value is not None}
+        updated = (
+            update(Holiday)
+            .where(Holiday.id == holiday_id)
+            .values(**values, updated_at=datetime.utcnow())
+            .returning(*(column for column in HOLIDAY_COLUMNS if column.key != "guests_count"))
+            .cte("updated")
+        )
+        guest_rows = (
+            select(func.json_agg(
+                aggregate_order_by(func.json_build_array(Guest.status, Guest.name, Guest.telegram_id), Guest.id),
+                type_=JSON,
+            ))
+            .where(Guest.holiday_id == updated.c.id)
+            .scalar_subquery()
+        )
         try:
-            if theme is not None:
-                holiday.theme = theme
-            if details is not None:
-                holiday.details = details
-            if latitude is not None:
-                holiday.latitude = latitude
-            if longitude is not None:
-                holiday.longitude = longitude
-            if location_address is not None:
-                holiday.location_address = location_address
-
-            holiday.updated_at = datetime.utcnow()
-            self.db.commit()
-            self.db.refresh(holiday)
-            return holiday
+            row = (await self.db.execute(select(updated, guest_rows.label("guest_rows")))).first()
+            await self.db.commit()
         except SQLAlchemyError as e:
-            self.db.rollback()
+            await self.db.rollback()
             raise Exception(f"Error updating holiday: {str(e)}")
+        if row is None:
+            return None
+        await cache.invalidate(*holiday_cache_keys(holiday_id))
+        holiday = dict(row._mapping)
+        holiday["guests"], holiday["status_counts"] = group_guests(holiday.pop("guest_rows") or ())
+        holiday["guests_count"] = sum(holiday["status_counts"].values())
+        return holiday
 
-    def delete_holiday(self, holiday_id: int) -> bool:
-        holiday = self.get_holiday(holiday_id)
-        if not holiday:
-            return False
-
+    async def delete_holiday(self, holiday_id: int) -> bool:
+        """Delete in one statement; guests go with it through ON DELETE CASCADE."""
+        stmt = delete(Holiday).where(Holiday.id == holiday_id).returning(Holiday.id)
         try:
-            self.db.delete(holiday)
-            self.db.commit()
-            return True
+            deleted = await self.db.scalar(stmt)
+            await self.db.commit()
         except SQLAlchemyError as e:
-            self.db.rollback()
+            await self.db.rollback()
             raise Exception(f"Error deleting holiday: {str(e)}")
+        if deleted is None:
+            return False
+        await cache.invalidate(*holiday_cache_keys(holiday_id))
+        return True
 
 class GuestService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def add_guest(
+    async def add_guest(
         self,
         holiday_id: int,
         name: str,
         telegram_id: Optional[str] = None,
         status: str = 'pending'
     ) -> Guest:
+        # Counters on the holiday are kept by the guests_sync_counts() trigger.
         try:
             guest = Guest(
                 holiday_id=holiday_id,
@@ -105,83 +383,167 @@ class GuestService:
                 status=status
             )
             self.db.add(guest)
-            
-            # Update the holiday's guests JSONB field
-            holiday = self.db.query(Holiday).filter(Holiday.id == holiday_id).first()
-            if not holiday:
-                raise Exception("Holiday not found")
-            
-            status_list = holiday.guests.get(status, [])
-            guest_info = {"name": name}
-            if telegram_id:
-                guest_info["telegram_id"] = telegram_id
-            status_list.append(guest_info)
-            holiday.guests[status] = status_list
-            holiday.guests_count = sum(len(guests) for guests in holiday.guests.values())
-            
-            self.db.commit()
-            self.db.refresh(guest)
-            return guest
+            await self.db.commit()
+            await self.db.refresh(guest)
+        except IntegrityError:
+            await self.db.rollback()
+            raise Exception("Holiday not found")
         except SQLAlchemyError as e:
-            self.db.rollback()
+            await self.db.rollback()
             raise Exception(f"Error adding guest: {str(e)}")
+        await cache.invalidate(*holiday_cache_keys(holiday_id))
+        return guest
 
-    def get_guest(self, guest_id: int) -> Optional[Guest]:
-        return self.db.query(Guest).filter(Guest.id == guest_id).first()
-
-    def get_holiday_guests(self, holiday_id: int) -> List[Guest]:
-        return self.db.query(Guest).filter(Guest.holiday_id == holiday_id).all()
+    async def bulk_add_guests(
+        self,
+        holiday_id: int,
+        batches: AsyncIterable[Sequence[Tuple[str, Optional[str], str]]]
+    ) -> Optional[int]:
+        """Insert ``(name, telegram_id, status)`` batches in a single transaction.
 
-    def update_guest_status(self, guest_id: int, new_status: str) -> Optional[Guest]:
-        guest = self.get_guest(guest_id)
-        if not guest:
+        Rows are COPYed into a temporary staging table and moved into guests
+        with one INSERT ... SELECT, so the count triggers run once for the
+        whole import. Returns the number of inserted guests, or None if the
+        holiday does not exist.
+        """
+        if await self.db.get(Holiday, holiday_id) is None:
             return None
 
         try:
-            old_status = guest.status
-            guest.status = new_status
-            
-            # Update the holiday's guests JSONB field
-            holiday = self.db.query(Holiday).filter(Holiday.id == guest.holiday_id).first()
-            if holiday:
-                # Remove from old status list
-                old_status_list = holiday.guests.get(old_status, [])
-                guest_info = next((g for g in old_status_list if g["name"] == guest.name), None)
-                if guest_info:
-                    old_status_list.remove(guest_info)
-                    holiday.guests[old_status] = old_status_list
-                
-                # Add to new status list
-                new_status_list = holiday.guests.get(new_status, [])
-                new_status_list.append(guest_info)
-                holiday.guests[new_status] = new_status_list
-            
-            self.db.commit()
-            self.db.refresh(guest)
-            return guest
+            await self.db.execute(text(
+                "CREATE TEMPORARY TABLE guest_import "
+                "(name text NOT NULL, telegram_id text, status text NOT NULL) ON COMMIT DROP"
+            ))
+            async for batch in batches:
+                await self._stage_guests(batch)
+            result = await self.db.execute(
+                text(
+                    "INSERT INTO guests (holiday_id, name, telegram_id, status) "
+                    "SELECT :holiday_id, name, telegram_id, status FROM guest_import"
+                ),
+                {"holiday_id": holiday_id}
+            )
+            await self.db.commit()
         except SQLAlchemyError as e:
-            self.db.rollback()
-            raise Exception(f"Error updating guest status: {str(e)}")
+            await self.db.rollback()
+            raise Exception(f"Error importing guests: {str(e)}")
+        await cache.invalidate(*holiday_cache_keys(holiday_id))
+        return result.rowcount
 
-    def remove_guest(self, guest_id: int) -> bool:
-        guest = self.get_guest(guest_id)
-        if not guest:
-            return False
+    async def _stage_guests(self, rows: Sequence[Tuple[str, Optional[str], str]]) -> None:
+        if isinstance(self.db, AsyncSession):
+            connection = await self.db.connection()
+            raw = await connection.get_raw_connection()
+            copy_records = getattr(raw.driver_connection, "copy_records_to_table", None)
+            if copy_records is not None:
+                await copy_records(
+                    "guest_import", records=rows, columns=("name", "telegram_id", "status")
+                )
+                return
+        # Drivers without COPY support (psycopg2 in DB_MODE=sync) use executemany.
+        await self.db.execute(
+            text(
+                "INSERT INTO guest_import (name, telegram_id, status) "
+                "VALUES (:name, :telegram_id, :status)"
+            ),
+            [{"name": name, "telegram_id": telegram_id, "status": status}
+             for name, telegram_id, status in rows]
+        )
+
+    async def get_guest(self, guest_id: int) -> Optional[Guest]:
+        result = await self.db.execute(select(Guest).where(Guest.id == guest_id))
+        return result.scalars().first()
+
+    async def get_holiday_guests(self, holiday_id: int) -> List[Guest]:
+        result = await self.db.execute(select(Guest).where(Guest.holiday_id == holiday_id))
+        return result.scalars().all()
+
+    async def holiday_guests_etag(self, holiday_id: int) -> str:
+        result = await self.db.execute(
+            select(Guest.id, Guest.updated_at)
+            .where(Guest.holiday_id == holiday_id)
+            .order_by(Guest.id)
+        )
+        return weak_etag([tuple(row) for row in result])
+
+    def stream_holiday_guests(self, holiday_id: int, batch_size: int = EXPORT_BATCH_SIZE):
+        stmt = (
+            select(*GUEST_EXPORT_COLUMNS)
+            .where(Guest.holiday_id == holiday_id)
+            .order_by(Guest.id)
+        )
+        return _stream_partitions(self.db, stmt, batch_size)
+
+    async def update_guest_status(self, guest_id: int, new_status: str) -> Optional[Guest]:
+        """One UPDATE ... RETURNING; None if no such guest."""
+        stmt = (
+            update(Guest)
+            .where(Guest.id == guest_id)
+            .values(status=new_status)
+            .returning(Guest)
+            .execution_options(synchronize_session=False)
+        )
+        guests = await self._update_returning(stmt)
+        return guests[0] if guests else None
+
+    async def update_guest_statuses(self, changes: Dict[int, str]) -> List[Guest]:
+        """Apply ``{guest_id: status}`` with one UPDATE ... FROM unnest() ... RETURNING.
+
+        Unknown ids are skipped; the updated guests are returned.
+        """
+        if not changes:
+            return []
 
+        wanted = func.unnest(
+            bindparam("guest_ids", list(changes), type_=ARRAY(Integer)),
+            bindparam("statuses", list(changes.values()), type_=ARRAY(String))
+        ).table_valued("guest_id", "status").render_derived(name="wanted")
+        stmt = (
+            update(Guest)
+            .where(Guest.id == wanted.c.guest_id)
+            .values(status=wanted.c.status)
+            .returning(Guest)
+            .execution_options(synchronize_session=False)
+        )
+        return await self._update_returning(stmt)
+
+    async def set_holiday_guests_status(
+        self,
+        holiday_id: int,
+        new_status: str,
+        current_status: Optional[str] = None
+    ) -> List[Guest]:
+        """Move every guest of a holiday (optionally only those in ``current_status``)."""
+        stmt = update(Guest).where(Guest.holiday_id == holiday_id, Guest.status != new_status)
+        if current_status is not None:
+            stmt = stmt.where(Guest.status == current_status)
+        stmt = (
+            stmt.values(status=new_status)
+            .returning(Guest)
+            .execution_options(synchronize_session=False)
+        )
+        return await self._update_returning(stmt)
+
+    async def _update_returning(self, stmt) -> List[Guest]:
         try:
-            # Update the holiday's guests JSONB field
-            holiday = self.db.query(Holiday).filter(Holiday.id == guest.holiday_id).first()
-            if holiday:
-                status_list = holiday.guests.get(guest.status, [])
-                guest_info = next((g for g in status_list if g["name"] == guest.name), None)
-                if guest_info:
-                    status_list.remove(guest_info)
-                    holiday.guests[guest.status] = status_list
-                holiday.guests_count = sum(len(guests) for guests in holiday.guests.values())
-
-            self.db.delete(guest)
-            self.db.commit()
-            return True
+            guests = (await self.db.scalars(stmt)).all()
+            await self.db.commit()
         except SQLAlchemyError as e:
-            self.db.rollback()
-            raise Exception(f"Error removing guest: {str(e)}")
\ No newline at end of file
+            await self.db.rollback()
+            raise Exception(f"Error updating guest status: {str(e)}")
+        await cache.invalidate(*holiday_cache_keys(*{guest.holiday_id for guest in guests}))
+        return guests
+
+    async def remove_guest(self, guest_id: int) -> bool:
+        """One DELETE ... RETURNING; False if no such guest."""
+        stmt = delete(Guest).where(Guest.id == guest_id).returning(Guest.holiday_id)
+        try:
+            holiday_id = await self.db.scalar(stmt)
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            raise Exception(f"Error removing guest: {str(e)}")
+        if holiday_id is None:
+            return False
+        await cache.invalidate(*holiday_cache_keys(holiday_id))
+        return True
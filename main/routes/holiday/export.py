@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+from datetime import date, datetime, time
+from typing import AsyncIterator, Sequence
+
+from fastapi.responses import StreamingResponse
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+async def _ndjson(partitions: AsyncIterator[Sequence], columns: Sequence[str]):
+    async for rows in partitions:
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False) + "\n"
+            for row in rows
+        )
+
+
+async def _csv(partitions: AsyncIterator[Sequence], columns: Sequence[str]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for rows in partitions:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_response(
+    partitions: AsyncIterator[Sequence],
+    columns: Sequence[str],
+    fmt: str,
+    filename: str
+) -> StreamingResponse:
+    """Stream row batches as NDJSON or CSV; only one batch is held in memory."""
+    encode = _csv if fmt == "csv" else _ndjson
+    return StreamingResponse(
+        encode(partitions, columns),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
@@ -0,0 +1,173 @@
+import codecs
+import csv
+import json
+from collections import deque
+from typing import AsyncIterator, Deque, List, Optional, Tuple, Type
+
+from fastapi import Request
+from pydantic import BaseModel, ValidationError
+
+BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+GuestRow = Tuple[str, Optional[str], str]
+
+
+class ImportErrors:
+    """Per-row problems found while parsing, capped so a bad file can't exhaust memory."""
+
+    def __init__(self):
+        self.count = 0
+        self.rows: List[dict] = []
+
+    def add(self, row: int, error: str) -> None:
+        self.count += 1
+        if len(self.rows) < MAX_REPORTED_ERRORS:
+            self.rows.append({"row": row, "error": error})
+
+
+async def _lines(request: Request) -> AsyncIterator[bytes]:
+    """Raw lines of the body, each with its line ending; a leading BOM is dropped.
+
+    Splitting bytes on ``\n`` is safe for UTF-8, and leaves decoding to the
+    caller so one bad line becomes a row error rather than a failed import.
+    """
+    pending = b""
+    first = True
+    async for chunk in request.stream():
+        pending += chunk
+        if first:
+            if len(pending) < len(codecs.BOM_UTF8):
+                continue
+            pending = pending.removeprefix(codecs.BOM_UTF8)
+            first = False
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line + b"\n"
+    if pending:
+        yield pending.removeprefix(codecs.BOM_UTF8) if first else pending
+
+
+async def _ndjson_records(request: Request, errors: ImportErrors):
+    number = 0
+    async for line in _lines(request):
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            yield number, json.loads(line.decode("utf-8"))
+        except UnicodeDecodeError:
+            errors.add(number, "Invalid UTF-8")
+        except ValueError as e:
+            errors.add(number, f"Invalid JSON: {e}")
+
+
+class _RecordFeed:
+    """Input of a single csv.reader, handed one complete record at a time.
+
+    The reader pulls a record only after it has fully arrived, so it never
+    sees the end of its input in the middle of a quoted field.
+    """
+
+    def __init__(self):
+        self.records: Deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.records:
+            raise StopIteration
+        return self.records.popleft()
+
+
+async def _csv_records(request: Request, errors: ImportErrors):
+    feed = _RecordFeed()
+    reader = csv.reader(feed)
+    header = None
+    number = 0
+    record: List[bytes] = []
+    quotes = 0
+    async for line in _lines(request):
+        record.append(line)
+        quotes += line.count(b'"')
+        if quotes % 2:
+            # Inside a quoted field that continues on the next line.
+            continue
+        raw, record, quotes = b"".join(record), [], 0
+        if not raw.strip():
+            continue
+        if header is not None:
+            number += 1
+        try:
+            feed.records.append(raw.decode("utf-8"))
+        except UnicodeDecodeError:
+            errors.add(number, "Invalid UTF-8")
+            if header is None:
+                return
+            continue
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            errors.add(number, f"Invalid CSV: {e}")
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) > len(header):
+            errors.add(number, "More values than header columns")
+            continue
+        yield number, {key: value for key, value in zip(header, values) if value != ""}
+    if record:
+        errors.add(number + 1, "Unterminated quoted field")
+
+
+async def _json_array_records(request: Request, errors: ImportErrors):
+    try:
+        records = json.loads(await request.body())
+    except ValueError as e:
+        errors.add(0, f"Invalid JSON: {e}")
+        return
+    if not isinstance(records, list):
+        errors.add(0, "Expected a JSON array of guests")
+        return
+    for number, record in enumerate(records, 1):
+        yield number, record
+
+
+def _records(request: Request, errors: ImportErrors):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return _ndjson_records(request, errors)
+    if content_type in ("text/csv", "application/csv"):
+        return _csv_records(request, errors)
+    return _json_array_records(request, errors)
+
+
+async def guest_batches(
+    request: Request,
+    model: Type[BaseModel],
+    errors: ImportErrors,
+    batch_size: int = BATCH_SIZE
+) -> AsyncIterator[List[GuestRow]]:
+    """Parse the request body as it streams in and yield validated rows in batches.
+
+    The format follows Content-Type: NDJSON, CSV with a header line, or (the
+    default) a JSON array. Rows that fail ``model`` validation are recorded
+    in ``errors`` by their 1-based position and skipped.
+    """
+    batch: List[GuestRow] = []
+    async for number, record in _records(request, errors):
+        try:
+            guest = model.model_validate(record)
+        except ValidationError as e:
+            errors.add(number, "; ".join(
+                f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in e.errors()
+            ))
+            continue
+        batch.append((guest.name, guest.telegram_id, guest.status))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -1,10 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from pydantic import BaseModel, Field
-from datetime import datetime
-from database import get_db
-from routes.holiday.crud import GuestService, HolidayService
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Literal, Optional, Union
+from pydantic import BaseModel, Field, model_validator
+from datetime import date, datetime
+from cache import cache
+from database import get_db, open_session
+from etag import etag_matches, not_modified, set_etag
+from pagination import MAX_PAGE_SIZE, Page, PageParams
+from responses import UTCJSONResponse
+from routes.holiday.crud import (
+    GUEST_EXPORT_COLUMNS,
+    HOLIDAY_COLUMNS,
+    GuestService,
+    HolidayService,
+    holiday_cache_key,
+    holiday_etag,
+)
+from routes.holiday.export import export_response
+from routes.holiday.guest_import import ImportErrors, guest_batches
 
 router = APIRouter()
 
@@ -26,6 +39,15 @@ class GuestResponse(GuestBase):
     class Config:
         from_attributes = True
 
+class GuestImportError(BaseModel):
+    row: int
+    error: str
+
+class GuestImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[GuestImportError]
+
 class HolidayBase(BaseModel):
     theme: str
     details: str
@@ -46,59 +68,162 @@ class HolidayUpdate(BaseModel):
 class HolidayResponse(HolidayBase):
     id: int
     guests_count: int
-    guests: dict
+    guests: Dict[str, List[dict]]
+    status_counts: Dict[str, int]
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
 
+class HolidayWithGuestsResponse(HolidayResponse):
+    guest_list: List[GuestResponse]
+
+HolidayInclude = Optional[Literal["guests"]]
+
+class NearbyHolidayResponse(HolidayResponse):
+    distance_km: float
+
+MAX_NEARBY_RADIUS_KM = 500
+
 # Holiday routes
 @router.post("/holidays/", response_model=HolidayResponse, status_code=status.HTTP_201_CREATED)
-def create_holiday(
+async def create_holiday(
     holiday: HolidayCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     holiday_service = HolidayService(db)
     try:
-        return holiday_service.create_holiday(**holiday.model_dump())
+        return await holiday_service.create_holiday(**holiday.model_dump())
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
-@router.get("/holidays/", response_model=List[HolidayResponse])
-def get_holidays(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+@router.get("/holidays/", response_model=Union[
+    List[HolidayWithGuestsResponse], Page[HolidayWithGuestsResponse],
+    List[HolidayResponse], Page[HolidayResponse],
+])
+async def get_holidays(
+    request: Request,
+    include: HolidayInclude = None,
+    params: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db)
 ):
+    """``include=guests`` adds each holiday's ``guest_list``."""
     holiday_service = HolidayService(db)
-    return holiday_service.get_all_holidays()
+    include_guests = include == "guests"
+    etag = await holiday_service.holidays_page_etag(params, include_guests)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    # Rows are already shaped like HolidayResponse, so skip re-validating them.
+    page = UTCJSONResponse(await holiday_service.get_all_holidays(params, include_guests))
+    set_etag(page, etag)
+    return page
+
+@router.get("/holidays/nearby", response_model=List[NearbyHolidayResponse])
+async def get_nearby_holidays(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=MAX_NEARBY_RADIUS_KM),
+    k: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    return await HolidayService(db).nearby_holidays(lat, lon, radius_km, k)
+
+class StatusSummary(BaseModel):
+    guests: int
+    by_status: Dict[str, int]
+    attendance_rate: float
+
+class HolidayStatusSummary(StatusSummary):
+    id: int
+
+class ActivityBucket(BaseModel):
+    start: date
+    total: int
+    by_status: Dict[str, int]
+
+class HolidayStats(StatusSummary):
+    activity: List[ActivityBucket]
+    holiday: Optional[HolidayStatusSummary] = None
+
+@router.get("/holidays/stats", response_model=HolidayStats)
+async def get_holiday_stats(
+    days: int = Query(30, ge=1, le=3660),
+    bucket: Literal["day", "week", "month"] = "day",
+    holiday_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Guest counts by status overall (and for ``holiday_id``) plus RSVP
+    activity by the UTC day, week or month of each guest's last update."""
+    stats = await HolidayService(db).get_stats(days, bucket, holiday_id)
+    if stats is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Holiday not found"
+        )
+    return stats
+
+ExportFormat = Literal["ndjson", "csv"]
 
-@router.get("/holidays/{holiday_id}", response_model=HolidayResponse)
-def get_holiday(
+# The stream outlives the request's dependencies, so exports open their own session.
+@router.get("/holidays/export")
+async def export_holidays(fmt: ExportFormat = Query("ndjson", alias="format")):
+    async def partitions():
+        async with open_session() as db:
+            async for rows in HolidayService(db).stream_holidays():
+                yield rows
+
+    columns = [column.key for column in HOLIDAY_COLUMNS]
+    return export_response(partitions(), columns, fmt, "holidays")
+
+@router.get("/holidays/{holiday_id}", response_model=Union[HolidayWithGuestsResponse, HolidayResponse])
+async def get_holiday(
     holiday_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    include: HolidayInclude = None,
+    db: AsyncSession = Depends(get_db)
 ):
+    """``include=guests`` adds the holiday's ``guest_list``.
+
+    Served from the holiday's cache entry, ETag included, so a hit or a
+    304 costs no query; the write paths invalidate the entry.
+    """
     holiday_service = HolidayService(db)
-    holiday = holiday_service.get_holiday(holiday_id)
-    if holiday is None:
+    include_guests = include == "guests"
+
+    async def load():
+        holiday = await holiday_service.get_holiday(holiday_id, include_guests)
+        if holiday is None:
+            return None
+        model = HolidayWithGuestsResponse if include_guests else HolidayResponse
+        return {
+            "etag": holiday_etag(holiday, include_guests),
+            "body": model.model_validate(holiday).model_dump(mode="json"),
+        }
+
+    cached = await cache.get_or_load(holiday_cache_key(holiday_id, include_guests), load)
+    if cached is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Holiday not found"
         )
-    return holiday
+    if etag_matches(request, cached["etag"]):
+        return not_modified(cached["etag"])
+    set_etag(response, cached["etag"])
+    return cached["body"]
 
 @router.put("/holidays/{holiday_id}", response_model=HolidayResponse)
-def update_holiday(
+async def update_holiday(
     holiday_id: int,
     holiday: HolidayUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     holiday_service = HolidayService(db)
-    updated_holiday = holiday_service.update_holiday(
+    updated_holiday = await holiday_service.update_holiday(
         holiday_id,
         **holiday.model_dump(exclude_unset=True)
     )
@@ -110,12 +235,12 @@ def update_holiday(
     return updated_holiday
 
 @router.delete("/holidays/{holiday_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_holiday(
+async def delete_holiday(
     holiday_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     holiday_service = HolidayService(db)
-    if not holiday_service.delete_holiday(holiday_id):
+    if not await holiday_service.delete_holiday(holiday_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Holiday not found"
@@ -124,14 +249,14 @@ def delete_holiday(
 
 # Guest routes
 @router.post("/holidays/{holiday_id}/guests/", response_model=GuestResponse, status_code=status.HTTP_201_CREATED)
-def add_guest(
+async def add_guest(
     holiday_id: int,
     guest: GuestCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     guest_service = GuestService(db)
     try:
-        return guest_service.add_guest(
+        return await guest_service.add_guest(
             holiday_id=holiday_id,
             **guest.model_dump()
         )
@@ -141,25 +266,80 @@ def add_guest(
             detail=str(e)
         )
 
+@router.post("/holidays/{holiday_id}/guests/bulk", response_model=GuestImportResult)
+async def bulk_add_guests(
+    holiday_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """Import guests from a JSON array, NDJSON or CSV body (chosen by Content-Type).
+
+    Invalid rows are reported in ``errors`` and skipped; the rest are
+    inserted together.
+    """
+    guest_service = GuestService(db)
+    errors = ImportErrors()
+    try:
+        inserted = await guest_service.bulk_add_guests(
+            holiday_id, guest_batches(request, GuestCreate, errors)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if inserted is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Holiday not found"
+        )
+    return {"inserted": inserted, "failed": errors.count, "errors": errors.rows}
+
 @router.get("/holidays/{holiday_id}/guests/", response_model=List[GuestResponse])
-def get_holiday_guests(
+async def get_holiday_guests(
     holiday_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
     guest_service = GuestService(db)
-    return guest_service.get_holiday_guests(holiday_id)
+    etag = await guest_service.holiday_guests_etag(holiday_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return await guest_service.get_holiday_guests(holiday_id)
+
+@router.get("/holidays/{holiday_id}/guests/export")
+async def export_holiday_guests(
+    holiday_id: int,
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+    db: AsyncSession = Depends(get_db)
+):
+    if not await HolidayService(db).holiday_exists(holiday_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Holiday not found"
+        )
+
+    async def partitions():
+        async with open_session() as stream_db:
+            async for rows in GuestService(stream_db).stream_holiday_guests(holiday_id):
+                yield rows
+
+    columns = [column.key for column in GUEST_EXPORT_COLUMNS]
+    return export_response(partitions(), columns, fmt, f"holiday-{holiday_id}-guests")
 
 class GuestStatusUpdate(BaseModel):
     status: str = Field(..., description="New status for the guest")
 
 @router.patch("/guests/{guest_id}/status", response_model=GuestResponse)
-def update_guest_status(
+async def update_guest_status(
     guest_id: int,
     status_update: GuestStatusUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     guest_service = GuestService(db)
-    updated_guest = guest_service.update_guest_status(guest_id, status_update.status)
+    updated_guest = await guest_service.update_guest_status(guest_id, status_update.status)
     if updated_guest is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -167,13 +347,53 @@ def update_guest_status(
         )
     return updated_guest
 
+class GuestStatusChange(BaseModel):
+    guest_id: int
+    status: str
+
+class GuestBatchStatusUpdate(BaseModel):
+    """Either explicit ``updates`` or ``holiday_id`` + ``status`` (optionally
+    only for guests currently in ``current_status``)."""
+    updates: Optional[List[GuestStatusChange]] = None
+    holiday_id: Optional[int] = None
+    current_status: Optional[str] = None
+    status: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_form(self):
+        if (self.updates is None) == (self.holiday_id is None):
+            raise ValueError("Provide either updates or holiday_id")
+        if self.holiday_id is not None and self.status is None:
+            raise ValueError("status is required with holiday_id")
+        return self
+
+@router.patch("/guests/status", response_model=List[GuestResponse])
+async def update_guest_statuses(
+    batch: GuestBatchStatusUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    guest_service = GuestService(db)
+    try:
+        if batch.updates is not None:
+            return await guest_service.update_guest_statuses(
+                {change.guest_id: change.status for change in batch.updates}
+            )
+        return await guest_service.set_holiday_guests_status(
+            batch.holiday_id, batch.status, batch.current_status
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 @router.delete("/guests/{guest_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_guest(
+async def remove_guest(
     guest_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     guest_service = GuestService(db)
-    if not guest_service.remove_guest(guest_id):
+    if not await guest_service.remove_guest(guest_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Guest not found"
@@ -0,0 +1,111 @@
+import os
+import uuid
+from datetime import time
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, or_, select
+
+from cache import cache
+from models import MINUTES_IN_DAY, SEARCH_CONFIG, Restaurant
+from pagination import PageParams, decode_cursor, encode_cursor
+
+# The timezone restaurant schedules are written in, and in which "now" is
+# taken when /restaurant/open gets no time; independent of the server's own.
+SCHEDULE_TZ = ZoneInfo(os.getenv("SCHEDULE_TZ", "UTC"))
+
+# Cached restaurant listings live this long. Restaurants are written out of
+# band (seeds, SQL), so unless the writer calls invalidate_restaurant_listings()
+# this is how stale a listing can be.
+RESTAURANT_LIST_CACHE_TTL = float(os.getenv("RESTAURANT_LIST_CACHE_TTL", "60"))
+
+# Holds the current listings version; every listing key includes it.
+_LISTINGS_VERSION_KEY = "restaurants:version"
+
+
+async def restaurant_listing_key(params: PageParams) -> str:
+    """Cache key of one listing page under the current listings version.
+
+    Built from the decoded cursor, so a malformed one is rejected before the
+    cache is consulted and equivalent encodings share an entry.
+    """
+    async def new_version():
+        return uuid.uuid4().hex
+
+    version = await cache.get_or_load(_LISTINGS_VERSION_KEY, new_version, RESTAURANT_LIST_CACHE_TTL)
+    if params.keyset:
+        after = decode_cursor(params.cursor, int) if params.cursor else None
+        return f"restaurants:{version}:after:{after}:{params.limit}"
+    return f"restaurants:{version}:{params.skip}:{params.limit}"
+
+
+async def invalidate_restaurant_listings() -> None:
+    """Drop every cached listing by moving to a new version; old ones age out."""
+    await cache.invalidate(_LISTINGS_VERSION_KEY)
+
+
+def minute_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def open_restaurants_stmt(start: time, end: Optional[time] = None):
+    """Restaurants open at ``start``, or for the whole slot ``start``..``end``.
+
+    Matches against the GiST-indexed ``open_minutes`` multirange, so a slot
+    that wraps past midnight is checked as its two halves.
+    """
+    first = minute_of_day(start)
+    last = None if end is None else minute_of_day(end)
+    if last is None or last == first:
+        return select(Restaurant).where(Restaurant.open_minutes.contains(first))
+
+    if first < last:
+        return select(Restaurant).where(
+            Restaurant.open_minutes.contains(func.int4range(first, last))
+        )
+    condition = Restaurant.open_minutes.contains(func.int4range(first, MINUTES_IN_DAY))
+    if last > 0:
+        condition = and_(condition, Restaurant.open_minutes.contains(func.int4range(0, last)))
+    return select(Restaurant).where(condition)
+
+
+async def search_restaurants(db, q: str, params: PageParams):
+    """Restaurants matching the web-search style query ``q``, best match first.
+
+    Name matches outrank menu matches, which outrank address matches. In
+    keyset mode the cursor carries the last (rank, id) seen.
+    """
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(Restaurant.search_vector, query)
+    stmt = (
+        select(Restaurant, rank.label("rank"))
+        .where(Restaurant.search_vector.op("@@")(query))
+        .order_by(rank.desc(), Restaurant.id)
+    )
+    if not params.keyset:
+        result = await db.execute(stmt.offset(params.skip).limit(params.limit))
+        return result.scalars().all()
+
+    if params.cursor:
+        last_rank, last_id = _decode_rank_cursor(params.cursor)
+        stmt = stmt.where(or_(rank < last_rank, and_(rank == last_rank, Restaurant.id > last_id)))
+    rows = (await db.execute(stmt.limit(params.limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        next_cursor = encode_cursor(f"{rows[-1].rank!r}:{rows[-1].Restaurant.id}")
+    return {"items": [row.Restaurant for row in rows], "next_cursor": next_cursor}
+
+
+def _decode_rank_cursor(cursor: str) -> Tuple[float, int]:
+    value = decode_cursor(cursor, str)
+    try:
+        last_rank, last_id = value.split(":")
+        return float(last_rank), int(last_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
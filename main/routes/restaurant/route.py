@@ -1,7 +1,21 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from datetime import datetime, time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from cache import cache
 from database import get_db
 from models import Restaurant
+from pagination import PageParams, paginate
+from routes.restaurant.crud import (
+    RESTAURANT_LIST_CACHE_TTL,
+    SCHEDULE_TZ,
+    open_restaurants_stmt,
+    restaurant_listing_key,
+    search_restaurants,
+)
 
 
 router = APIRouter(
@@ -10,5 +24,43 @@ router = APIRouter(
 )
 
 @router.get("/")
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(Restaurant).offset(skip).limit(limit).all()
+async def read_restaurants(params: PageParams = Depends(), db: AsyncSession = Depends(get_db)):
+    """Cached for RESTAURANT_LIST_CACHE_TTL, or until invalidate_restaurant_listings()."""
+    async def load():
+        return jsonable_encoder(await paginate(db, select(Restaurant), Restaurant.id, params))
+
+    return await cache.get_or_load(await restaurant_listing_key(params), load, RESTAURANT_LIST_CACHE_TTL)
+
+@router.get("/open")
+async def read_open_restaurants(
+    at: Optional[time] = None,
+    start: Optional[time] = Query(None, alias="from"),
+    end: Optional[time] = Query(None, alias="to"),
+    params: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db)
+):
+    """Restaurants open at ``at`` (default: now), or for the whole ``from``..``to`` slot.
+
+    Times are local to the schedules' timezone, SCHEDULE_TZ (UTC unless
+    configured), whatever the server's; so is "now". A slot with ``to``
+    earlier than ``from`` runs past midnight.
+    """
+    if start is not None or end is not None:
+        if start is None or end is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Both from and to are required"
+            )
+        stmt = open_restaurants_stmt(start, end)
+    else:
+        stmt = open_restaurants_stmt(at or datetime.now(SCHEDULE_TZ).time())
+    return await paginate(db, stmt, Restaurant.id, params)
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    params: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db)
+):
+    """Full-text search over names, menu items and addresses, ranked by relevance."""
+    return await search_restaurants(db, q, params)
@@ -0,0 +1,177 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Annotated, Optional, Tuple
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import cache
+from database import get_db
+from . import crud
+
+# JWT конфигурация
+SECRET_KEY = "sosal"
+ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
+
+# Verified tokens are remembered for at most this long, and never past their exp.
+AUTH_TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+# The user row behind a token is cached unversioned (checking a version would
+# cost the query this saves). Writes invalidate it, but another worker's
+# in-memory copy lives until this TTL, which bounds how long it can be stale.
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
+
+
+class TokenCache:
+    """LRU of token digest -> (email, user id, exp) for tokens that already verified."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, Tuple[float, str, Optional[int], float]]" = OrderedDict()
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key: bytes) -> Optional[Tuple[str, Optional[int], float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, email, user_id, token_exp = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return email, user_id, token_exp
+
+    def set(self, key: bytes, email: str, user_id: Optional[int], token_exp: float) -> None:
+        self._entries[key] = (min(token_exp, time.time() + self.ttl), email, user_id, token_exp)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: bytes) -> None:
+        self._entries.pop(key, None)
+
+
+token_cache = TokenCache(AUTH_TOKEN_CACHE_SIZE, AUTH_TOKEN_CACHE_TTL)
+
+
+def _decode(token: str) -> Tuple[str, float]:
+    from jose import JWTError, jwt
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token",
+        )
+    email: str = payload.get("sub")
+    if email is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token does not contain email",
+        )
+    expiration = payload.get("exp")
+    if expiration is None or expiration < time.time():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has expired",
+        )
+    return email, expiration
+
+
+# Верификация токена
+def verify_token(token: str = Depends(oauth2_scheme)) -> str:
+    key = TokenCache.digest(token)
+    cached = token_cache.get(key)
+    if cached is not None:
+        return cached[0]
+    email, expiration = _decode(token)
+    token_cache.set(key, email, None, expiration)
+    return email
+
+
+def token_subject(authorization: str) -> Optional[str]:
+    """The verified subject of an ``Authorization: Bearer`` header, else None.
+
+    Used by the admission middleware to key per-user rate limits; it shares
+    token_cache with the route dependencies so a token is decoded only once.
+    """
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return verify_token(token)
+    except HTTPException:
+        return None
+
+
+async def current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+) -> dict:
+    """The authenticated user, shaped like schemas.User.
+
+    A token seen before costs no JWT check and no query: its user id comes
+    from token_cache and the row from the read-through user cache, which
+    the user write paths invalidate. Only the first request with a token
+    looks the user up by email, on the request's own session.
+    """
+    key = TokenCache.digest(token)
+    cached = token_cache.get(key)
+    if cached is None:
+        email, expiration = _decode(token)
+        user_id = None
+    else:
+        email, user_id, expiration = cached
+
+    if user_id is None:
+        db_user = await crud.get_user_by_email(db, email=email)
+        if db_user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        token_cache.set(key, email, db_user.id, expiration)
+        entry = crud.user_cache_entry(db_user)
+
+        async def loaded():
+            return entry
+
+        # Seed the user cache so the next request with this token needs no query.
+        return (await cache.get_or_load(crud.user_cache_key(db_user.id), loaded, AUTH_USER_CACHE_TTL))["body"]
+
+    async def load():
+        db_user = await crud.get_user(db, user_id=user_id)
+        return None if db_user is None else crud.user_cache_entry(db_user)
+
+    entry = await cache.get_or_load(crud.user_cache_key(user_id), load, AUTH_USER_CACHE_TTL)
+    user = None if entry is None else entry["body"]
+    # Deleted, or the email the token was issued for has changed.
+    if user is None or user["email"] != email:
+        token_cache.discard(key)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
+
+
+# Утилита для создания JWT токена
+def create_access_token(data: dict, expires_delta: timedelta = None):
+    from jose import jwt
+
+    to_encode = data.copy()
+    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
+    to_encode.update({"exp": expire})
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
@@ -1,39 +1,83 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
+from cache import cache
+from etag import weak_etag
 from models import User
+from pagination import PageParams, as_dicts, paginate
+from . import schemas
 
-def create_user(db: Session, username: str, email: str, password: str):
+def user_cache_key(user_id: int) -> str:
+    """Key of a user's cached ``{"etag", "body"}`` entry.
+
+    Shared by GET /users/{id}, which answers a hit (a 304 included) without
+    a query, and auth.current_user. Unversioned: the write paths below
+    invalidate it after committing.
+    """
+    return f"user:{user_id}"
+
+def user_cache_entry(db_user: User) -> dict:
+    return {
+        "etag": weak_etag(db_user.id, db_user.updated_at),
+        "body": schemas.User.model_validate(db_user).model_dump(mode="json"),
+    }
+
+async def create_user(db: AsyncSession, username: str, email: str, password: str):
     db_user = User(username=username, email=email, password=password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-def get_user(db: Session, user_id: int):
-    return db.query(User).filter(User.id == user_id).first()
+async def get_user(db: AsyncSession, user_id: int):
+    result = await db.execute(select(User).where(User.id == user_id))
+    return result.scalars().first()
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+# The fields of schemas.User.
+USER_COLUMNS = (User.id, User.username, User.email)
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).offset(skip).limit(limit).all()
+async def get_users(db: AsyncSession, params: PageParams):
+    """A page of users as plain dicts shaped like schemas.User."""
+    return as_dicts(await paginate(db, select(*USER_COLUMNS), User.id, params, scalars=False))
 
-def update_user(db: Session, user_id: int, username: Optional[str] = None, 
-                email: Optional[str] = None, bio: Optional[str] = None):
-    db_user = db.query(User).filter(User.id == user_id).first()
+async def users_page_etag(db: AsyncSession, params: PageParams) -> str:
+    page = await paginate(db, select(User.id, User.updated_at), User.id, params, scalars=False)
+    if params.keyset:
+        return weak_etag([tuple(row) for row in page["items"]], page["next_cursor"])
+    return weak_etag([tuple(row) for row in page])
+
+async def update_user(db: AsyncSession, user_id: int, username: Optional[str] = None,
+                email: Optional[str] = None):
+    """Apply the given fields in one UPDATE ... RETURNING; None if no such user."""
+    values = {field: value for field, value in (("username", username), ("email", email)) if value}
+    if not values:
+        return await get_user(db, user_id)
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(**values)
+        .returning(User)
+        .execution_options(synchronize_session=False)
+    )
+    db_user = (await db.scalars(stmt)).first()
+    await db.commit()
     if db_user:
-        if username:
-            db_user.username = username
-        if email:
-            db_user.email = email
-        db.commit()
-        db.refresh(db_user)
+        await cache.invalidate(user_cache_key(user_id))
     return db_user
 
-def delete_user(db: Session, user_id: int):
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if db_user:
-        db.delete(db_user)
-        db.commit()
-        return True
-    return False
+async def set_password(db: AsyncSession, user_id: int, password_hash: str) -> None:
+    await db.execute(update(User).where(User.id == user_id).values(password=password_hash))
+    await db.commit()
+    await cache.invalidate(user_cache_key(user_id))
+
+async def delete_user(db: AsyncSession, user_id: int):
+    deleted = await db.scalar(delete(User).where(User.id == user_id).returning(User.id))
+    await db.commit()
+    if deleted is None:
+        return False
+    await cache.invalidate(user_cache_key(user_id))
+    return True
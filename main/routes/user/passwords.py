@@ -0,0 +1,80 @@
+import asyncio
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+import bcrypt
+from fastapi import HTTPException, status
+
+# Cost factor for new hashes. Raising it rehashes each user on their next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt releases the GIL, so a few threads hash in parallel without touching the
+# event loop or the request threadpool. Always at least one: hashing inline
+# would stall every request on the loop.
+PASSWORD_HASH_WORKERS = max(1, int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))))
+# Hashes allowed to wait for a worker; past that, requests fail fast with 503
+# instead of piling up in the executor's unbounded queue.
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", str(4 * PASSWORD_HASH_WORKERS)))
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+# Running plus waiting hashes. Only checked with locked() before acquiring,
+# so acquiring never waits.
+_slots = asyncio.Semaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE)
+
+
+async def _run(fn, *args):
+    if _slots.locked():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy (password hashing)",
+            headers={"Retry-After": "1"},
+        )
+    async with _slots:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def _verify(password: str, stored: str) -> bool:
+    if not is_bcrypt_hash(stored):
+        # Accounts created before hashing still hold the plain password.
+        return hmac.compare_digest(password.encode(), stored.encode())
+    return bcrypt.checkpw(password.encode(), stored.encode())
+
+
+def is_bcrypt_hash(stored: str) -> bool:
+    return stored.startswith(("$2a$", "$2b$", "$2y$")) and len(stored) == 60
+
+
+def hash_rounds(stored: str) -> Optional[int]:
+    return int(stored[4:6]) if is_bcrypt_hash(stored) else None
+
+
+def needs_rehash(stored: str) -> bool:
+    return hash_rounds(stored) != BCRYPT_ROUNDS
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password, BCRYPT_ROUNDS)
+
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    return _hash("unused", BCRYPT_ROUNDS)
+
+
+def _verify_unknown(password: str) -> bool:
+    # Unknown emails cost one bcrypt check too, so timing doesn't reveal them.
+    _verify(password, _dummy_hash())
+    return False
+
+
+async def verify_password(password: str, stored: Optional[str]) -> bool:
+    """Check ``password`` against a stored hash; ``stored=None`` always fails."""
+    if stored is None:
+        return await _run(_verify_unknown, password)
+    return await _run(_verify, password, stored)
@@ -1,17 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import Annotated, List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, List, Union
+from cache import cache
 from database import get_db
-from . import crud, schemas  # Import from the same directory
-from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime, timedelta
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import jwt
-from database import SessionLocal
-# JWT конфигурация
-SECRET_KEY = "sosal"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+from etag import etag_matches, not_modified, set_etag
+from pagination import Page, PageParams
+from responses import UTCJSONResponse
+from . import crud, passwords, schemas  # Import from the same directory
+from .auth import create_access_token, current_user
 
 
 router = APIRouter(
@@ -19,109 +15,93 @@ router = APIRouter(
     tags=["users"]
 )
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
 
-# Верификация токена
-def verify_token(token: str = Depends(oauth2_scheme)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token does not contain email",
-            )
-        expiration = payload.get("exp")
-        if expiration < datetime.utcnow().timestamp():
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token has expired",
-            )
-        return email
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token",
-        )
-
-# Утилита для создания JWT токена
-def create_access_token(data: dict, expires_delta: timedelta = None):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-
-
-@router.get("/verify-token")
-def verify_route(
-    email: Annotated[str, Depends(verify_token)],
-    db: Annotated[Session, Depends(get_db)]
-):
-    user = crud.get_user_by_email(db=SessionLocal(), email=email)
-    if not user:
-        raise HTTPException(
-            status_code=404,
-            detail="User not found"
-        )
+@router.get("/verify-token", response_model=schemas.User)
+async def verify_route(user: Annotated[dict, Depends(current_user)]):
     return user
 
 # Эндпоинт для логина
 @router.post("/login")
-def login(login_data: schemas.LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: schemas.LoginRequest, db: AsyncSession = Depends(get_db)):
     # Проверяем email
-    user = crud.get_user_by_email(db, email=login_data.email)
-    if not user or user.password != login_data.password:  # Пароль без хэширования
+    user = await crud.get_user_by_email(db, email=login_data.email)
+    stored = user.password if user else None
+    if not await passwords.verify_password(login_data.password, stored):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неправильный email или пароль"
         )
+    # Plain-text legacy passwords and hashes of an old cost get upgraded here.
+    if passwords.needs_rehash(stored):
+        await crud.set_password(db, user.id, await passwords.hash_password(login_data.password))
 
     # Создаём JWT токен
     access_token = create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await crud.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    return crud.create_user(
+    return await crud.create_user(
         db=db,
         username=user.username,
         email=user.email,
-        password=user.password  # Note: In production, hash the password before storing
+        password=await passwords.hash_password(user.password)
     )
 
 @router.get("/{user_id}", response_model=schemas.User)
-def read_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = crud.get_user(db, user_id=user_id)
-    if db_user is None:
+async def read_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """Served from the user's cache entry, ETag included, so a hit or a 304
+    costs no query."""
+    async def load():
+        db_user = await crud.get_user(db, user_id=user_id)
+        return None if db_user is None else crud.user_cache_entry(db_user)
+
+    cached = await cache.get_or_load(crud.user_cache_key(user_id), load)
+    if cached is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    return db_user
+    if etag_matches(request, cached["etag"]):
+        return not_modified(cached["etag"])
+    set_etag(response, cached["etag"])
+    return cached["body"]
 
-@router.get("/", response_model=List[schemas.User])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = crud.get_users(db, skip=skip, limit=limit)
+@router.get("/", response_model=Union[List[schemas.User], Page[schemas.User]])
+async def read_users(
+    request: Request,
+    params: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db)
+):
+    etag = await crud.users_page_etag(db, params)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    users = UTCJSONResponse(await crud.get_users(db, params))
+    set_etag(users, etag)
     return users
 
 @router.patch("/{user_id}", response_model=schemas.User)
-def update_user(
+async def update_user(
     user_id: int,
     user_update: schemas.UserUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    updated_user = crud.update_user(
+    updated_user = await crud.update_user(
         db=db,
         user_id=user_id,
         username=user_update.username,
-        email=user_update.email,
-        bio=user_update.bio
+        email=user_update.email
     )
     if updated_user is None:
         raise HTTPException(
@@ -131,8 +111,8 @@ def update_user(
     return updated_user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    success = crud.delete_user(db, user_id=user_id)
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    success = await crud.delete_user(db, user_id=user_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,171 @@
+import contextvars
+import json
+import logging
+import random
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+MAX_SQL_LENGTH = 4000
+MAX_SHAPE_ITEMS = 20
+
+_NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),                    # string literals
+    (re.compile(r"\$\d+|%\(\w+\)s|%s"), "?"),               # asyncpg / psycopg2 placeholders
+    (re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?(?![\w$])"), "?"),  # numeric literals
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), "(?, ...)"),   # IN lists of any length
+    (re.compile(r"\s+"), " "),
+)
+
+# The request being served, so a statement can be traced back to its route.
+_request_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar(
+    "slow_query_scope", default=None
+)
+
+
+def normalize_sql(statement: str) -> str:
+    """One line per query shape: literals and placeholders become ``?``."""
+    for pattern, replacement in _NORMALIZE:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()[:MAX_SQL_LENGTH]
+
+
+def _shape(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        items = list(parameters.items())
+        shape = {key: type(value).__name__ for key, value in items[:MAX_SHAPE_ITEMS]}
+        if len(items) > MAX_SHAPE_ITEMS:
+            shape["..."] = f"{len(items) - MAX_SHAPE_ITEMS} more"
+        return shape
+    if isinstance(parameters, (list, tuple)):
+        shape = [type(value).__name__ for value in parameters[:MAX_SHAPE_ITEMS]]
+        if len(parameters) > MAX_SHAPE_ITEMS:
+            shape.append(f"... {len(parameters) - MAX_SHAPE_ITEMS} more")
+        return shape
+    return None
+
+
+def parameters_shape(parameters: Any, executemany: bool) -> Any:
+    """Parameter names and types, never values: they may hold emails or passwords."""
+    if executemany:
+        return {"rows": len(parameters), "row": _shape(parameters[0]) if parameters else None}
+    return _shape(parameters)
+
+
+def _route(scope: Optional[dict]) -> Optional[str]:
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route is not None else scope['path']}"
+
+
+class SlowQueryLog:
+    """Statements slower than ``threshold`` seconds, newest last, in a ring buffer.
+
+    A ``explain_rate`` fraction of slow SELECTs is run again under
+    EXPLAIN (ANALYZE, BUFFERS) on the same connection, inside a savepoint,
+    so the plan reflects the transaction's own snapshot and a failing
+    EXPLAIN cannot abort the request's transaction. Sampled statements
+    therefore cost twice their time.
+    """
+
+    def __init__(self, threshold: float, explain_rate: float, size: int):
+        self.threshold = threshold
+        self.explain_rate = explain_rate
+        self.entries: deque = deque(maxlen=size)
+        self.recorded = 0
+
+    def attach(self, engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "handle_error", self._on_error)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+    def _on_error(self, exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("slow_query_started"):
+            conn.info["slow_query_started"].pop()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["slow_query_started"].pop()
+        if elapsed < self.threshold:
+            return
+
+        sql = normalize_sql(statement)
+        entry: Dict[str, Any] = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "route": _route(_request_scope.get()),
+            "sql": sql,
+            "parameters": parameters_shape(parameters, executemany),
+            "executemany": executemany,
+        }
+        streaming = context is not None and context.execution_options.get("stream_results")
+        if (
+            not executemany and not streaming
+            and sql.upper().startswith("SELECT") and "NEXTVAL(" not in sql.upper()
+            and random.random() < self.explain_rate
+        ):
+            entry.update(self._explain(conn, statement, parameters))
+
+        self.recorded += 1
+        self.entries.append(entry)
+        logger.warning(f"Slow query {entry['duration_ms']}ms on {entry['route'] or '-'}: {sql[:500]}")
+
+    def _explain(self, conn, statement: str, parameters: Any) -> dict:
+        # Raw DBAPI cursor: bypasses the engine events, so this is not recorded itself.
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters)
+                plan = cursor.fetchone()[0]
+            finally:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return {"plan": plan[0]}
+        except Exception as e:
+            logger.warning(f"EXPLAIN of slow query failed: {str(e)}")
+            return {"explain_error": str(e)}
+        finally:
+            cursor.close()
+
+    def snapshot(self, limit: Optional[int] = None) -> dict:
+        entries: List[dict] = list(self.entries)[::-1]
+        return {
+            "enabled": self.threshold > 0,
+            "threshold_ms": round(self.threshold * 1000, 3),
+            "explain_rate": self.explain_rate,
+            "recorded": self.recorded,
+            "entries": entries[:limit] if limit else entries,
+        }
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+class RequestScopeMiddleware:
+    """Make the current request visible to SlowQueryLog for its ``route`` field."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from sqlalchemy import text
+
+from database import Base, async_engine
+
+logger = logging.getLogger(__name__)
+
+# What the app does with the database while starting up:
+# "check"      - compare alembic_version with the migration head (default)
+# "create_all" - the old behaviour, create any missing tables
+# "skip"       - nothing; the first request opens the first connection
+STARTUP_DB = os.getenv("STARTUP_DB", "check").lower()
+STARTUP_DB_TIMEOUT = float(os.getenv("STARTUP_DB_TIMEOUT", "5"))
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic")
+
+
+class MigrationMismatch(RuntimeError):
+    pass
+
+
+def alembic_heads() -> set:
+    # Only the check needs alembic, so it's imported here.
+    from alembic.script import ScriptDirectory
+
+    return set(ScriptDirectory(ALEMBIC_DIR).get_heads())
+
+
+async def current_revisions() -> Optional[set]:
+    """Revisions stamped in alembic_version; None if the table doesn't exist."""
+    async with async_engine.connect() as conn:
+        exists = await conn.scalar(text("SELECT to_regclass('alembic_version')"))
+        if exists is None:
+            return None
+        return set((await conn.execute(text("SELECT version_num FROM alembic_version"))).scalars())
+
+
+async def check_migrations() -> None:
+    heads = alembic_heads()
+    try:
+        current = await asyncio.wait_for(current_revisions(), STARTUP_DB_TIMEOUT)
+    except Exception as e:
+        # An unreachable database must not stop the worker; requests retry via the pool.
+        logger.warning(f"Skipping migration check, database unavailable: {str(e)}")
+        return
+    if current != heads:
+        raise MigrationMismatch(
+            f"Database is at revision {sorted(current or [])}, code expects {sorted(heads)}; "
+            "run `alembic upgrade head`"
+        )
+    logger.info(f"Database schema at {', '.join(sorted(heads))}")
+
+
+async def create_all() -> None:
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def prepare_database(mode: str = STARTUP_DB) -> None:
+    if mode == "check":
+        await check_migrations()
+    elif mode == "create_all":
+        await asyncio.wait_for(create_all(), STARTUP_DB_TIMEOUT)
+    elif mode != "skip":
+        raise ValueError(f"Unknown STARTUP_DB mode: {mode}")
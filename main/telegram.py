@@ -3,11 +3,15 @@ from aiogram.filters import Command
 from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
 import asyncio
 import logging
-from typing import Dict
+import os
+import time
+from typing import Dict, Optional
 from openai_service import OpenAIAsyncClient
 from env import BOT_TOKEN, OPENAI_API_KEY
+from metrics import CONTENT_TYPE, registry
 
 # Configure logging
 logging.basicConfig(
@@ -16,6 +20,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# The bot has no HTTP server of its own; set this to expose /metrics
+# (OpenAI call latency) for Prometheus.
+BOT_METRICS_PORT = int(os.getenv("BOT_METRICS_PORT", "0"))
+# Stream replies: send the first words as soon as they arrive, then edit the
+# message at most once per BOT_STREAM_EDIT_INTERVAL seconds (Telegram rate
+# limits edits). "false" waits for the whole reply like before.
+BOT_STREAM_REPLIES = os.getenv("BOT_STREAM_REPLIES", "true").lower() in ("1", "true", "yes", "on")
+BOT_STREAM_EDIT_INTERVAL = float(os.getenv("BOT_STREAM_EDIT_INTERVAL", "1.0"))
+MESSAGE_LIMIT = 4000
+
 # Initialize router
 router = Router()
 
@@ -41,6 +55,64 @@ async def cmd_new(message: Message):
         del user_threads[user_id]
     await message.answer("Starting a new conversation thread. Send me a message!")
 
+class StreamedReply:
+    """A reply that grows in place: one message edited as text arrives,
+    continued in a new message past Telegram's length limit."""
+
+    def __init__(self, message: Message):
+        self.message = message
+        self.sent: Optional[Message] = None
+        self.text = ""
+        self.shown = ""
+        self.next_edit = 0.0
+
+    async def add(self, delta: str):
+        self.text += delta
+        while len(self.text) > MESSAGE_LIMIT:
+            head, self.text = self.text[:MESSAGE_LIMIT], self.text[MESSAGE_LIMIT:]
+            await self._show(head, final=True)
+            self.sent, self.shown = None, ""
+        if self.sent is None or time.monotonic() >= self.next_edit:
+            await self._show(self.text)
+
+    async def finish(self):
+        await self._show(self.text, final=True)
+
+    async def _show(self, text: str, final: bool = False):
+        # Telegram trims whitespace and rejects empty texts and no-op edits.
+        if not text.strip() or text.rstrip() == self.shown.rstrip():
+            return
+        try:
+            if self.sent is None:
+                self.sent = await self.message.answer(text)
+            else:
+                await self.sent.edit_text(text)
+        except TelegramRetryAfter as e:
+            if final:
+                await asyncio.sleep(e.retry_after)
+                return await self._show(text, final)
+            # Skip this intermediate edit, a later one shows more text anyway.
+            self.next_edit = time.monotonic() + e.retry_after
+            return
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                raise
+        self.shown = text
+        self.next_edit = time.monotonic() + BOT_STREAM_EDIT_INTERVAL
+
+async def stream_reply(message: Message):
+    user_id = message.from_user.id
+    thread_id = user_threads.get(user_id)
+    if thread_id is None:
+        thread_id = user_threads[user_id] = await openai_client.create_thread()
+
+    reply = StreamedReply(message)
+    async for delta in openai_client.stream_message(thread_id, message.text):
+        await reply.add(delta)
+    await reply.finish()
+    if reply.sent is None:
+        await message.answer("Sorry, I couldn't come up with a reply. Please try again.")
+
 @router.message()
 async def handle_message(message: Message):
     """Handler for all text messages"""
@@ -51,6 +123,10 @@ async def handle_message(message: Message):
         # Show typing status
         await message.bot.send_chat_action(message.chat.id, 'typing')
         
+        if BOT_STREAM_REPLIES:
+            await stream_reply(message)
+            return
+        
         # Process message with OpenAI
         thread_id = user_threads.get(user_id)
         result = await openai_client.process_and_poll(user_message, thread_id)
@@ -85,11 +161,26 @@ async def handle_message(message: Message):
         logger.error(f"Error in message handler: {str(e)}")
         await message.answer("An error occurred while processing your message. Please try again later.")
 
+async def start_metrics_server(port: int):
+    from aiohttp import web
+
+    async def metrics(request):
+        return web.Response(body=registry.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, port=port).start()
+    logger.info(f"Serving metrics on port {port}")
+    return runner
+
 async def main():
     # Initialize bot and dispatcher
     bot = Bot(token=BOT_TOKEN)
     dp = Dispatcher(storage=MemoryStorage())
     dp.include_router(router)
+    metrics_runner = await start_metrics_server(BOT_METRICS_PORT) if BOT_METRICS_PORT else None
     
     try:
         # Start polling
@@ -97,6 +188,8 @@ async def main():
     finally:
         await bot.session.close()
         await openai_client.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""Round trips of the write endpoints, pinned with assert_num_queries.
+
+Runs the app in process against the database in DATABASE_URL:
+
+    cd main
+    DATABASE_URL=postgresql://... python -m pytest -q
+"""
+import os
+import uuid
+
+import pytest
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+
+from fastapi.testclient import TestClient
+
+from cache import cache
+from main import app
+from query_count import assert_num_queries
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def holiday(client):
+    holiday = client.post("/holidays/", json={"theme": "query counts", "details": "-"}).json()
+    yield holiday
+    client.delete(f"/holidays/{holiday['id']}")
+
+
+@pytest.fixture
+def guest(client, holiday):
+    return client.post(f"/holidays/{holiday['id']}/guests/", json={"name": "guest"}).json()
+
+
+@pytest.fixture
+def user(client):
+    email = f"query-counts-{uuid.uuid4().hex[:8]}@example.com"
+    user = client.post("/users/", json={"username": email, "email": email, "password": "x" * 8}).json()
+    yield user
+    client.delete(f"/users/{user['id']}")
+
+
+def test_update_holiday_is_one_statement(client, holiday, guest):
+    with assert_num_queries(1):
+        response = client.put(f"/holidays/{holiday['id']}", json={"theme": "renamed"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["theme"] == "renamed"
+    assert body["guests_count"] == 1
+    assert body["guests"] == {"pending": [{"name": "guest"}]}
+
+
+def test_update_missing_holiday_is_one_statement(client):
+    with assert_num_queries(1):
+        response = client.put("/holidays/0", json={"theme": "renamed"})
+    assert response.status_code == 404
+
+
+def test_delete_holiday_is_one_statement(client, holiday):
+    with assert_num_queries(1):
+        response = client.delete(f"/holidays/{holiday['id']}")
+    assert response.status_code == 204
+
+
+def test_update_guest_status_is_one_statement(client, guest):
+    with assert_num_queries(1):
+        response = client.patch(f"/guests/{guest['id']}/status", json={"status": "present"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "present"
+
+
+def test_remove_guest_is_one_statement(client, guest):
+    with assert_num_queries(1):
+        response = client.delete(f"/guests/{guest['id']}")
+    assert response.status_code == 204
+    with assert_num_queries(1):
+        response = client.delete(f"/guests/{guest['id']}")
+    assert response.status_code == 404
+
+
+def test_update_user_is_one_statement(client, user):
+    with assert_num_queries(1):
+        response = client.patch(f"/users/{user['id']}", json={"username": f"{user['username']}-renamed"})
+    assert response.status_code == 200
+
+
+def test_delete_user_is_one_statement(client, user):
+    with assert_num_queries(1):
+        response = client.delete(f"/users/{user['id']}")
+    assert response.status_code == 204
+
+
+needs_cache = pytest.mark.skipif(cache.backend is None, reason="CACHE_BACKEND is none")
+
+
+@needs_cache
+@pytest.mark.parametrize("query", ["", "?include=guests"])
+def test_cached_holiday_costs_no_query(client, holiday, guest, query):
+    path = f"/holidays/{holiday['id']}{query}"
+    etag = client.get(path).headers["ETag"]
+    with assert_num_queries(0):
+        assert client.get(path).status_code == 200
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    client.patch(f"/guests/{guest['id']}/status", json={"status": "present"})
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["status_counts"] == {"present": 1}
+
+
+@needs_cache
+def test_cached_user_costs_no_query(client, user):
+    path = f"/users/{user['id']}"
+    etag = client.get(path).headers["ETag"]
+    with assert_num_queries(0):
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    client.patch(path, json={"username": f"{user['username']}-renamed"})
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["username"] == f"{user['username']}-renamed"
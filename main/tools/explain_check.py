@@ -0,0 +1,154 @@
+"""Fail when a hot query plans a sequential scan over a large table.
+
+Runs the read paths of HolidayService, GuestService and routes/user/crud.py
+against the database in DATABASE_URL, captures every SELECT they send and
+EXPLAINs it. Any Seq Scan on a table holding more than --threshold rows is
+reported and the exit status is 1.
+
+    cd main
+    python -m tools.explain_check --seed     # seed once, then check
+    python -m tools.explain_check --threshold 5000
+
+Only point it at a local or throwaway database: --seed inserts test rows.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Dict, List, Tuple
+
+from sqlalchemy import event, text
+
+from database import AsyncSessionLocal, async_engine
+from pagination import PageParams
+from routes.holiday.crud import GuestService, HolidayService
+from routes.user import crud as user_crud
+
+SEED_TAG = "explain-check"
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO holidays (theme, details, created_at, updated_at)
+    SELECT :tag, 'seeded holiday ' || g, now(), now()
+    FROM generate_series(1, :holidays) AS g
+    """,
+    """
+    INSERT INTO guests (holiday_id, name, telegram_id, status)
+    SELECT h.id, 'guest ' || g, (h.id * 100000 + g)::text,
+           (ARRAY['pending', 'present', 'absent'])[1 + g % 3]
+    FROM holidays h CROSS JOIN generate_series(1, :guests) AS g
+    WHERE h.theme = :tag
+    """,
+    """
+    INSERT INTO users (username, email, password)
+    SELECT :tag || '-' || g, :tag || '-' || g || '@example.com', 'x'
+    FROM generate_series(1, :users) AS g
+    ON CONFLICT DO NOTHING
+    """,
+)
+
+
+async def seed(holidays: int, guests: int, users: int) -> None:
+    async with async_engine.begin() as conn:
+        params = {"tag": SEED_TAG, "holidays": holidays, "guests": guests, "users": users}
+        for statement in SEED_STATEMENTS:
+            await conn.execute(text(statement), params)
+    async with async_engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE"))
+
+
+def hot_queries(db, holiday_id: int, guest_id: int, user_id: int, email: str):
+    holidays = HolidayService(db)
+    guests = GuestService(db)
+    first_page = PageParams(pagination="cursor", cursor=None, skip=0, limit=100)
+    return [
+        ("HolidayService.get_holiday", lambda: holidays.get_holiday(holiday_id)),
+        ("HolidayService.get_all_holidays", lambda: holidays.get_all_holidays(first_page)),
+        ("get_all_holidays(include_guests)", lambda: holidays.get_all_holidays(first_page, True)),
+        ("GuestService.get_guest", lambda: guests.get_guest(guest_id)),
+        ("GuestService.get_holiday_guests", lambda: guests.get_holiday_guests(holiday_id)),
+        ("crud.get_user", lambda: user_crud.get_user(db, user_id)),
+        ("crud.get_user_by_email", lambda: user_crud.get_user_by_email(db, email)),
+        ("crud.get_users", lambda: user_crud.get_users(db, first_page)),
+    ]
+
+
+def seq_scans(plan: dict) -> List[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+async def capture_statements(db, sample: Tuple[int, int, int, str]) -> List[Tuple[str, str, tuple]]:
+    captured = []
+    label = None
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((label, statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        for label, run in hot_queries(db, *sample):
+            await run()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", on_execute)
+    return captured
+
+
+async def check(threshold: int) -> int:
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(text(
+            "SELECT g.holiday_id, g.id FROM guests g ORDER BY g.id DESC LIMIT 1"
+        ))).first()
+        user = (await db.execute(text("SELECT id, email FROM users ORDER BY id DESC LIMIT 1"))).first()
+        if row is None or user is None:
+            print("No guests or users to check against, run with --seed first.")
+            return 2
+        captured = await capture_statements(db, (row[0], row[1], user[0], user[1]))
+
+        sizes: Dict[str, float] = dict((await db.execute(text(
+            "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'"
+        ))).all())
+
+        conn = await db.connection()
+        failures = 0
+        for label, statement, parameters in captured:
+            plan = (await conn.exec_driver_sql(
+                "EXPLAIN (FORMAT JSON) " + statement, parameters
+            )).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            scans = [t for t in seq_scans(plan[0]["Plan"]) if sizes.get(t, 0) > threshold]
+            verdict = "FAIL" if scans else "ok"
+            print(f"{verdict:4} {label:34} {' '.join(statement.split())[:90]}")
+            for table in scans:
+                print(f"     seq scan on {table} (~{int(sizes[table])} rows)")
+            failures += bool(scans)
+    return 1 if failures else 0
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", action="store_true", help="insert test data before checking")
+    parser.add_argument("--holidays", type=int, default=2000)
+    parser.add_argument("--guests", type=int, default=50, help="guests per seeded holiday")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--threshold", type=int, default=10000,
+                        help="tables above this many rows must not be seq scanned")
+    args = parser.parse_args()
+
+    try:
+        if args.seed:
+            await seed(args.holidays, args.guests, args.users)
+        return await check(args.threshold)
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,328 @@
+"""Drive the API with concurrent clients through realistic scenarios.
+
+Seeds the database in DATABASE_URL with tagged users, holidays carrying
+thousands of guests and restaurants with large menus (--seed), spawns
+uvicorn (or uses --url) and runs each scenario for --duration seconds:
+
+* rsvp       - guests changing their status, one by one and in batches;
+* dashboard  - holiday listings, stats, a holiday with its guests, restaurant search;
+* login      - POST /users/login as seeded users;
+* export     - the holiday and guest-list exports, read to the end.
+
+Prints one JSON object with p50/p95/p99 latency, throughput and status
+codes per endpoint and scenario. --compare takes an earlier result and
+adds the change of each endpoint's p95 and throughput, so runs on two
+commits can be compared:
+
+    cd main
+    python -m tools.load_bench --seed --output before.json
+    git checkout other-branch
+    python -m tools.load_bench --compare before.json
+
+Server settings (DB_MODE, ADMISSION_*, BCRYPT_ROUNDS, ...) come from the
+environment. Only point it at a local or throwaway database: --seed
+inserts rows and the rsvp scenario rewrites guest statuses.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+from sqlalchemy import text
+
+from tools.login_bench import percentiles, wait_ready
+from tools.startup_bench import APP_DIR, free_port
+
+SEED_TAG = "load-bench"
+SEED_PASSWORD = "load-bench-password"
+STATUSES = ("pending", "present", "absent")
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO users (username, email, password)
+    SELECT :tag || '-' || g, :tag || '-' || g || '@example.com', :password_hash
+    FROM generate_series(1, :users) AS g
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO holidays (theme, details, latitude, longitude, created_at, updated_at)
+    SELECT :tag, 'Праздник номер ' || g || ', приходите всей семьёй',
+           43.2 + random() * 0.2, 76.8 + random() * 0.2, now(), now()
+    FROM generate_series(1, :holidays) AS g
+    """,
+    """
+    INSERT INTO guests (holiday_id, name, telegram_id, status)
+    SELECT h.id, 'Гость ' || g, (h.id::bigint * 100000 + g)::text,
+           (ARRAY['pending', 'present', 'absent'])[1 + g % 3]
+    FROM holidays h CROSS JOIN generate_series(1, :guests) AS g
+    WHERE h.theme = :tag
+    """,
+    """
+    INSERT INTO restaurants (name, address, menu, schedule_open, schedule_close)
+    SELECT :tag || ' ресторан ' || r, 'ул. Абая, ' || r,
+           (SELECT json_build_object('items', json_agg(json_build_object(
+                'name', 'Блюдо ' || i,
+                'description', 'Домашнее блюдо со сметаной и зеленью, порция ' || i,
+                'price', 500 + (r * i) % 4500
+            ))) FROM generate_series(1, :menu_items) AS i),
+           make_time(8 + r % 4, 0, 0), make_time(22, 0, 0)
+    FROM generate_series(1, :restaurants) AS r
+    """,
+)
+
+Request = Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]
+
+
+async def seed(args) -> None:
+    from database import async_engine
+    from routes.user.passwords import hash_password
+
+    params = {
+        "tag": SEED_TAG,
+        "password_hash": await hash_password(SEED_PASSWORD),
+        "users": args.users,
+        "holidays": args.holidays,
+        "guests": args.guests,
+        "restaurants": args.restaurants,
+        "menu_items": args.menu_items,
+    }
+    try:
+        async with async_engine.begin() as conn:
+            for statement in SEED_STATEMENTS:
+                await conn.execute(text(statement), params)
+        async with async_engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("ANALYZE"))
+    finally:
+        await async_engine.dispose()
+
+
+async def seeded_ids() -> dict:
+    from database import async_engine
+
+    try:
+        async with async_engine.connect() as conn:
+            holidays = (await conn.execute(
+                text("SELECT id FROM holidays WHERE theme = :tag ORDER BY id"), {"tag": SEED_TAG}
+            )).scalars().all()
+            guests = (await conn.execute(text(
+                "SELECT min(g.id), max(g.id) FROM guests g JOIN holidays h ON h.id = g.holiday_id "
+                "WHERE h.theme = :tag"
+            ), {"tag": SEED_TAG})).one()
+            users = (await conn.execute(
+                text("SELECT count(*) FROM users WHERE email LIKE :pattern"), {"pattern": f"{SEED_TAG}-%"}
+            )).scalar()
+    finally:
+        await async_engine.dispose()
+    if not holidays or guests[0] is None or not users:
+        raise SystemExit("No seeded data found, run with --seed first.")
+    return {"holidays": holidays, "guests": guests, "users": users}
+
+
+async def _read_all(client: httpx.AsyncClient, url: str) -> httpx.Response:
+    async with client.stream("GET", url) as response:
+        async for _ in response.aiter_raw():
+            pass
+    return response
+
+
+def scenarios(ids: dict) -> Dict[str, List[Tuple[str, int, Request]]]:
+    """Scenario -> (endpoint label, weight, request) choices."""
+    holidays = ids["holidays"]
+    first_guest, last_guest = ids["guests"]
+
+    def guest_id() -> int:
+        return random.randint(first_guest, last_guest)
+
+    def login_body() -> dict:
+        return {"email": f"{SEED_TAG}-{random.randint(1, ids['users'])}@example.com", "password": SEED_PASSWORD}
+
+    return {
+        "rsvp": [
+            ("PATCH /guests/{id}/status", 8, lambda c: c.patch(
+                f"/guests/{guest_id()}/status", json={"status": random.choice(STATUSES)}
+            )),
+            ("PATCH /guests/status", 1, lambda c: c.patch("/guests/status", json={"updates": [
+                {"guest_id": guest_id(), "status": random.choice(STATUSES)} for _ in range(20)
+            ]})),
+            ("GET /holidays/{id}", 1, lambda c: c.get(f"/holidays/{random.choice(holidays)}")),
+        ],
+        "dashboard": [
+            ("GET /holidays/", 4, lambda c: c.get("/holidays/", params={"pagination": "cursor", "limit": 50})),
+            ("GET /holidays/stats", 2, lambda c: c.get("/holidays/stats")),
+            ("GET /holidays/{id}?include=guests", 2, lambda c: c.get(
+                f"/holidays/{random.choice(holidays)}", params={"include": "guests"}
+            )),
+            ("GET /holidays/{id}/guests/", 1, lambda c: c.get(f"/holidays/{random.choice(holidays)}/guests/")),
+            ("GET /restaurant/search", 1, lambda c: c.get(
+                "/restaurant/search", params={"q": random.choice(("сметана", "блюдо зелень", "Абая"))}
+            )),
+        ],
+        "login": [
+            ("POST /users/login", 1, lambda c: c.post("/users/login", json=login_body())),
+        ],
+        "export": [
+            ("GET /holidays/export", 1, lambda c: _read_all(c, "/holidays/export")),
+            ("GET /holidays/{id}/guests/export", 4, lambda c: _read_all(
+                c, f"/holidays/{random.choice(holidays)}/guests/export?format=csv"
+            )),
+        ],
+    }
+
+
+async def run_scenario(url: str, choices, concurrency: int, duration: float) -> dict:
+    labels = [label for label, _, _ in choices]
+    weights = [weight for _, weight, _ in choices]
+    requests = {label: request for label, _, request in choices}
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        stop = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < stop:
+                label = random.choices(labels, weights)[0]
+                started = time.perf_counter()
+                try:
+                    status = (await requests[label](client)).status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                elapsed = time.perf_counter() - started
+                statuses[label][status] += 1
+                if isinstance(status, int) and status < 400:
+                    latencies[label].append(elapsed)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for label in labels:
+        total = sum(statuses[label].values())
+        if not total:
+            continue
+        endpoints[label] = {
+            **percentiles(latencies[label]),
+            "requests": total,
+            "errors": total - len(latencies[label]),
+            "throughput_rps": round(len(latencies[label]) / elapsed, 1),
+            "statuses": {str(status): count for status, count in sorted(statuses[label].items(), key=str)},
+        }
+    ok = sum(len(samples) for samples in latencies.values())
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "throughput_rps": round(ok / elapsed, 1),
+        "errors": sum(sum(counts.values()) for counts in statuses.values()) - ok,
+        "latency": percentiles([sample for samples in latencies.values() for sample in samples]),
+        "endpoints": endpoints,
+    }
+
+
+def compare(result: dict, baseline: dict) -> dict:
+    """Relative change of p95 and throughput per endpoint; positive p95 is slower."""
+    changes = {}
+    for name, scenario in result["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name, {}).get("endpoints", {})
+        for label, now in scenario["endpoints"].items():
+            then = before.get(label)
+            if not then or not then.get("p95_ms") or not now.get("p95_ms"):
+                continue
+            changes[f"{name} {label}"] = {
+                "p95_ms": [then["p95_ms"], now["p95_ms"]],
+                "p95_change": round(now["p95_ms"] / then["p95_ms"] - 1, 3),
+                "throughput_change": round(now["throughput_rps"] / then["throughput_rps"] - 1, 3)
+                if then["throughput_rps"] else None,
+            }
+    return changes
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def bench(url: str, args) -> dict:
+    ids = await seeded_ids()
+    async with httpx.AsyncClient(base_url=url) as client:
+        await wait_ready(client, args.timeout)
+
+    available = scenarios(ids)
+    results = {}
+    for name in args.scenario or list(available):
+        concurrency = args.export_concurrency if name == "export" else args.concurrency
+        results[name] = await run_scenario(url, available[name], concurrency, args.duration)
+    return {
+        "commit": git_commit(),
+        "seeded": {"holidays": len(ids["holidays"]), "guests": ids["guests"][1] - ids["guests"][0] + 1,
+                   "users": ids["users"]},
+        "scenarios": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="benchmark a running server instead of spawning one")
+    parser.add_argument("--scenario", action="append", choices=["rsvp", "dashboard", "login", "export"],
+                        help="run only these scenarios (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--export-concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per scenario")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds to wait for startup")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    parser.add_argument("--compare", help="earlier --output to compare against")
+    parser.add_argument("--seed", action="store_true", help="insert test data before running")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--holidays", type=int, default=200)
+    parser.add_argument("--guests", type=int, default=2000, help="guests per seeded holiday")
+    parser.add_argument("--restaurants", type=int, default=500)
+    parser.add_argument("--menu-items", type=int, default=200, help="menu items per seeded restaurant")
+    args = parser.parse_args()
+
+    if args.seed:
+        asyncio.run(seed(args))
+
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+             "--port", str(port), "--log-level", "warning"],
+            cwd=APP_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+    try:
+        result = asyncio.run(bench(url, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        result["compared_to"] = baseline.get("commit")
+        result["changes"] = compare(result, baseline)
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Flood POST /users/login and check that the API still answers quickly.
+
+Spawns uvicorn (or uses --url), registers a throwaway user, then runs
+--concurrency login loops for --duration seconds while a probe requests
+GET /health every --probe-interval seconds. Reports login throughput and
+latency, and /health latency during the flood, as one JSON object.
+
+    cd main
+    python -m tools.login_bench --concurrency 32 --duration 10
+    PASSWORD_HASH_QUEUE=0 python -m tools.login_bench   # 503 once every worker is busy
+
+Server settings (BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE, ...)
+come from the environment. The user it creates is left in the database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from typing import List
+
+import httpx
+
+from tools.startup_bench import APP_DIR, free_port
+
+
+def percentiles(samples: List[float]) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 1),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 1),
+    }
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.05)
+    raise RuntimeError(f"/health did not answer within {timeout}s")
+
+
+async def flood(url: str, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        await wait_ready(client, args.timeout)
+        email = f"login-bench-{uuid.uuid4().hex[:12]}@example.com"
+        password = "login-bench-password"
+        created = await client.post("/users/", json={
+            "username": email.split("@")[0], "email": email, "password": password
+        })
+        created.raise_for_status()
+
+        stop = time.perf_counter() + args.duration
+        logins: List[float] = []
+        health: List[float] = []
+        errors = 0
+
+        async def login_loop():
+            nonlocal errors
+            while time.perf_counter() < stop:
+                started = time.perf_counter()
+                response = await client.post("/users/login", json={"email": email, "password": password})
+                if response.status_code == 200:
+                    logins.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        async def probe():
+            while time.perf_counter() < stop:
+                started = time.perf_counter()
+                await client.get("/health")
+                health.append(time.perf_counter() - started)
+                await asyncio.sleep(args.probe_interval)
+
+        started = time.perf_counter()
+        await asyncio.gather(probe(), *(login_loop() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "bcrypt_rounds": int(os.getenv("BCRYPT_ROUNDS", "12")),
+        "hash_workers": os.getenv("PASSWORD_HASH_WORKERS", "default"),
+        "hash_queue": os.getenv("PASSWORD_HASH_QUEUE", "default"),
+        "logins_per_s": round(len(logins) / elapsed, 1),
+        "login_errors": errors,
+        "login_latency": percentiles(logins),
+        "health_latency": percentiles(health),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="benchmark a running server instead of spawning one")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=30, help="seconds to wait for startup")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+             "--port", str(port), "--log-level", "warning"],
+            cwd=APP_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+    try:
+        result = asyncio.run(flood(url, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
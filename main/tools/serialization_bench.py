@@ -0,0 +1,130 @@
+"""Compare the response_model path of list endpoints with the projected orjson one.
+
+Builds synthetic holidays in memory (no database queries) and times, per page:
+
+* response_model - ORM objects validated into HolidayResponse by FastAPI's
+                   serialize_response, then rendered by JSONResponse;
+* projection     - the dicts HolidayService.get_all_holidays now returns,
+                   rendered by UTCJSONResponse;
+
+plus gzip and brotli over the projected body.
+
+    cd main
+    python -m tools.serialization_bench --rows 500 --repeat 20
+
+DATABASE_URL must be set because the app modules build their engines on
+import, but nothing connects. Prints one JSON object.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from compression import COMPRESS_BROTLI_QUALITY, COMPRESS_GZIP_LEVEL, brotli
+from models import Holiday
+from responses import UTCJSONResponse
+from routes.holiday.route import HolidayResponse
+
+
+def make_rows(count: int, guests_per_holiday: int) -> List[dict]:
+    now = datetime(2026, 10, 18, 12, 0, 0, 123456)
+    rows = []
+    for i in range(1, count + 1):
+        guests = {
+            status: [{"name": f"Гость {i}-{n}", "telegram_id": str(100000 + n)}
+                     for n in range(guests_per_holiday) if n % 3 == k]
+            for k, status in enumerate(("pending", "present", "absent"))
+        }
+        rows.append({
+            "id": i,
+            "theme": f"Праздник {i}",
+            "details": "Дни рождения, корпоративы и свадьбы " * 3,
+            "latitude": 43.2 + i / 1e4,
+            "longitude": 76.9 - i / 1e4,
+            "location_address": f"ул. Абая, {i}",
+            "guests_count": guests_per_holiday,
+            "created_at": now,
+            "updated_at": now + timedelta(seconds=i),
+            "guests": guests,
+            "status_counts": {status: len(items) for status, items in guests.items()},
+        })
+    return rows
+
+
+def make_holidays(rows: List[dict]) -> List[Holiday]:
+    holidays = []
+    for row in rows:
+        columns = {key: value for key, value in row.items() if key not in ("guests", "status_counts")}
+        holiday = Holiday(**columns)
+        holiday.guests = row["guests"]
+        holiday.status_counts = row["status_counts"]
+        holidays.append(holiday)
+    return holidays
+
+
+def timed(fn, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500, help="holidays per page")
+    parser.add_argument("--guests", type=int, default=10, help="guests per holiday")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.guests)
+    holidays = make_holidays(rows)
+    field = create_model_field("Response", List[HolidayResponse], mode="serialization")
+
+    def response_model_path():
+        content = asyncio.run(serialize_response(field=field, response_content=holidays))
+        return JSONResponse(content).body
+
+    def projection_path():
+        return UTCJSONResponse(rows).body
+
+    baseline_ms, baseline_body = timed(response_model_path, args.repeat)
+    fast_ms, body = timed(projection_path, args.repeat)
+    if json.loads(baseline_body) != json.loads(body):
+        print("projection output differs from the response_model output", file=sys.stderr)
+        return 1
+
+    result = {
+        "rows": args.rows,
+        "guests_per_holiday": args.guests,
+        "body_bytes": len(body),
+        "response_model_ms": round(baseline_ms, 3),
+        "projection_ms": round(fast_ms, 3),
+        "speedup": round(baseline_ms / fast_ms, 1),
+    }
+    gzip_ms, gzipped = timed(
+        lambda: zlib.compress(body, COMPRESS_GZIP_LEVEL, wbits=31), args.repeat
+    )
+    result["gzip"] = {"ms": round(gzip_ms, 3), "bytes": len(gzipped)}
+    if brotli is not None:
+        br_ms, compressed = timed(
+            lambda: brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY), args.repeat
+        )
+        result["brotli"] = {"ms": round(br_ms, 3), "bytes": len(compressed)}
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())